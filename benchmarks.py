@@ -0,0 +1,154 @@
+import json
+import platform
+import random
+from argparse import ArgumentParser
+from datetime import date, datetime, timedelta
+from os import environ, path
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from models import Client, Room, Reservation, get_connection, transaction
+from controllers import ReportController
+from validations import ReservationRequest
+
+
+def generate(rooms: int, clients: int, reservations: int, seed: int = 0) -> None:
+    """
+    Fills the current database with a synthetic hotel. Room capacities lean towards couples,
+    prices grow with the capacity, and every room gets a timeline of stays of 1 to 14 nights with
+    no overlaps, starting a year ago. The gaps between stays are sized so the timelines run about
+    a year past today, leaving past, current and future reservations.
+
+    :param int rooms:
+    :param int clients:
+    :param int reservations:
+    :param int seed:
+    """
+    generator = random.Random(seed)
+    with transaction():
+        for number in range(clients):
+            Client.save({'name': f'Cliente {number}', 'email': f'cliente{number}@pyhotel.com', 'phone': f'{number:09d}'})
+        for number in range(rooms):
+            capacity: int = generator.choices([1, 2, 3, 4, 6], weights=[15, 45, 20, 15, 5])[0]
+            Room.save({'number': number + 1, 'maximum_capacity': capacity, 'diary_price': round(capacity * generator.uniform(60, 140), 2)})
+        start: date = date.today() - timedelta(days=365)
+        timelines: list = [start + timedelta(days=generator.randrange(30)) for _ in range(rooms)]
+        gap: float = max(730 * rooms / max(reservations, 1) - 4, 1)
+        for _ in range(reservations):
+            room_id: int = generator.randrange(rooms)
+            check_in_date: date = timelines[room_id] + timedelta(days=int(generator.expovariate(1 / gap)))
+            check_out_date: date = check_in_date + timedelta(days=min(1 + int(generator.expovariate(1 / 3)), 14))
+            timelines[room_id] = check_out_date
+            Reservation.save({
+                'client_id': generator.randrange(clients),
+                'room_id': room_id,
+                'check_in_date': check_in_date,
+                'check_out_date': check_out_date,
+            })
+
+
+def measure(function, repeat: int) -> dict:
+    """
+    Calls function repeat times, returning the best, median and mean time of a call in seconds
+
+    :param function:
+    :param int repeat:
+    :return dict:
+    """
+    timings: list = []
+    for _ in range(repeat):
+        started: float = perf_counter()
+        function()
+        timings.append(perf_counter() - started)
+    return {'calls': repeat, 'best': min(timings), 'median': median(timings), 'mean': sum(timings) / repeat}
+
+
+def operations(rooms: int, clients: int, seed: int = 0) -> dict:
+    """
+    Returns the operations to time, each a function of no arguments
+
+    :param int rooms:
+    :param int clients:
+    :param int seed:
+    :return dict:
+    """
+    generator = random.Random(seed)
+    report: ReportController = ReportController()
+    request: ReservationRequest = ReservationRequest()
+    today: date = date.today()
+    reservation: dict = {'client_id': generator.randrange(clients), 'room_id': generator.randrange(rooms), 'check_in_date': '01/01/2030', 'check_out_date': '05/01/2030'}
+    batch: list = [dict(reservation, client_id=generator.randrange(clients), room_id=generator.randrange(rooms)) for _ in range(100)]
+    return {
+        'Model.find': lambda: Room.find(generator.randrange(rooms)),
+        'Reservation.room': lambda: Reservation.find(0).room(),
+        'Room.reservations': lambda: Room.find(generator.randrange(rooms)).reservations(),
+        'Request.validate': lambda: request.validate(reservation, 'create'),
+        'Request.validate_many(100)': lambda: request.validate_many(batch, 'create'),
+        'ReportController.get_total_balance': report.get_total_balance,
+        'ReportController.get_rooms_currently_reserved': report.get_rooms_currently_reserved,
+        'ReportController.get_rooms_currently_free': report.get_rooms_currently_free,
+        'ReportController.get_available_rooms(20)': lambda: report.get_available_rooms(today + timedelta(days=7), today + timedelta(days=10), 2, limit=20),
+        'ReportController.get_available_rooms': lambda: report.get_available_rooms(today + timedelta(days=7), today + timedelta(days=10), 2),
+        'ReportController.get_period_report': lambda: report.get_period_report(today - timedelta(days=90), today, 'month'),
+        'Model.iter_all': lambda: sum(1 for _ in Client.iter_all()),
+    }
+
+
+def run(sizes: list, engines: list, repeat: int = 5, seed: int = 0) -> list:
+    """
+    Generates a hotel of each size for each storage engine in a temporary directory and times
+    every operation against it. A size is the number of rooms; the hotel gets twice as many
+    clients and five times as many reservations.
+
+    :param list sizes:
+    :param list engines:
+    :param int repeat:
+    :param int seed:
+    :return list:
+    """
+    results: list = []
+    previous: dict = {name: environ.get(name) for name in ('PYHOTEL_STORAGE', 'PYHOTEL_DATABASE')}
+    try:
+        for engine in engines:
+            for size in sizes:
+                with TemporaryDirectory() as directory:
+                    environ['PYHOTEL_STORAGE'] = engine
+                    environ['PYHOTEL_DATABASE'] = path.join(directory, 'database.sqlite3' if engine == 'sqlite' else 'database.dat')
+                    counts: dict = {'rooms': size, 'clients': size * 2, 'reservations': size * 5}
+                    timing: dict = measure(lambda: generate(counts['rooms'], counts['clients'], counts['reservations'], seed), 1)
+                    results.append({'engine': engine, 'size': size, **counts, 'operation': 'generate', **timing})
+                    for operation, function in operations(counts['rooms'], counts['clients'], seed).items():
+                        results.append({'engine': engine, 'size': size, **counts, 'operation': operation, **measure(function, repeat)})
+                    connection = get_connection()
+                    if hasattr(connection, 'connection'):
+                        connection.connection.close()
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                environ.pop(name, None)
+            else:
+                environ[name] = value
+    return results
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Mede o desempenho das operações do PyHotel sobre hotéis sintéticos')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help='quantidades de quartos')
+    parser.add_argument('--engines', nargs='+', choices=['pickle', 'sqlite'], default=['pickle', 'sqlite'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmarks.json')
+    arguments = parser.parse_args()
+    results: list = run(arguments.sizes, arguments.engines, arguments.repeat, arguments.seed)
+    with open(arguments.output, 'w', encoding='utf-8') as file:
+        json.dump({
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'report_engine': environ.get('PYHOTEL_REPORT_ENGINE', 'python'),
+            'results': results,
+        }, file, indent=2)
+    for result in results:
+        print(f'{result["engine"]:>6} {result["size"]:>7} {result["operation"]:<48} {result["median"] * 1000:>10.3f} ms')
+    print(f'Resultados salvos em {arguments.output}')
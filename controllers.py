@@ -1,10 +1,28 @@
 from abc import ABC
+from itertools import islice
 from typing import Type, List
 from pprint import pprint
 
-from models import Model, Reservation, Room
-from exceptions import ReserveRoomAlreadyReservedException
-from utils import count_days_from_interval
+import metrics
+from metrics import instrument
+from models import MODELS, Model, Reservation, Room, transaction, get_connection, get_database_path, get_storage_engine
+from reports import ReportEngine, create_report_engine
+from exceptions import ReserveRoomUnavailableException
+from utils import count_days_from_interval, cast_date, format_date, today
+
+
+def cast_stay(check_in_date, check_out_date) -> tuple:
+    """
+    Casts the dates of a stay, raising a ValueError unless the check-out comes after the check-in
+
+    :param check_in_date:
+    :param check_out_date:
+    :return tuple:
+    """
+    check_in_date, check_out_date = cast_date(check_in_date), cast_date(check_out_date)
+    if check_out_date <= check_in_date:
+        raise ValueError('A data de check-out deve ser posterior à data de check-in')
+    return check_in_date, check_out_date
 
 
 class Controller(ABC):
@@ -16,14 +34,26 @@ class CrudController(Controller, ABC):
         self.model_class = model_class
 
 
-    def create(self, data: dict) -> Model:
-        return self.model_class.save(data)
+    def create(self, data: dict, id: int | None = None) -> Model:
+        return self.model_class.save(data, id)
 
 
     def find_all(self) -> list:
         return self.model_class.find_all()
 
 
+    def iter_all(self):
+        return self.model_class.iter_all()
+
+
+    def page(self, offset: int, limit: int) -> list:
+        return self.model_class.page(offset, limit)
+
+
+    def count(self) -> int:
+        return self.model_class.count()
+
+
     def find(self, id: int) -> Model:
         return self.model_class.find(id)
 
@@ -45,36 +75,99 @@ class RoomController(CrudController):
 
 
 class ReservationController(CrudController):
-    def create(self, data: dict) -> Model:
+    def create(self, data: dict, id: int | None = None) -> Model:
+        check_in_date, check_out_date = cast_stay(data['check_in_date'], data['check_out_date'])
         room: Room = Room.find(data['room_id'])
-        if room.is_reservated():
-           raise ReserveRoomAlreadyReservedException(room.number)
-        reservation: Reservation = Reservation.save(data)
+        reservation: Reservation | None = Reservation.reserve(data, id)
+        if reservation is None:
+           raise ReserveRoomUnavailableException(room.number, format_date(check_in_date), format_date(check_out_date))
         return reservation
     
 
     def update(self, data: dict, reservation: Reservation) -> Model:
-        if (room_id := data.get('room_id')) and room_id != reservation.room_id:
-            room: Room = Room.find(room_id)
-            if room.is_reservated():
-                raise ReserveRoomAlreadyReservedException(room_id)
-        return reservation.update(data)
+        room_id: int = data.get('room_id', reservation.room_id)
+        check_in_date = data.get('check_in_date', reservation.check_in_date)
+        check_out_date = data.get('check_out_date', reservation.check_out_date)
+        check_in_date, check_out_date = cast_stay(check_in_date, check_out_date)
+        with transaction():
+            if (room_id, check_in_date, check_out_date) != (reservation.room_id, reservation.check_in_date, reservation.check_out_date):
+                room: Room = Room.find(room_id)
+                if not room.is_free(check_in_date, check_out_date, reservation.id):
+                    raise ReserveRoomUnavailableException(room.number, format_date(check_in_date), format_date(check_out_date))
+            return reservation.update(data)
     
     
 class ReportController(Controller):
+    def __init__(self, engine: ReportEngine | None = None) -> None:
+        self.engine = engine or create_report_engine()
+
+
+    @instrument()
     def get_total_balance(self) -> dict:
-        total_balance: float = 0
-        reservations: List[Reservation] = Reservation.get_paids()
-        for reservation in reservations:
-            total_balance += reservation.get_balance()
-        return {'total_balance': total_balance, 'reservations': reservations}            
+        return self.engine.get_revenue()
+    
     
+    @instrument()
+    def get_period_report(self, start_date, end_date, group_by: str = 'day') -> list:
+        return self.engine.get_period_report(start_date, end_date, group_by)
     
+    
+    @instrument()
     def get_rooms_currently_reserved(self) -> List[Room]:
-        return [room for room in Room.find_all() if room.is_reservated()]
+        return Room.find_many(sorted(self.engine.get_reserved_room_ids(today())))
     
     
+    @instrument()
     def get_rooms_currently_free(self) -> List[Room]:
-        return [room for room in Room.find_all() if not room.is_reservated()]
+        return Room.find_free(today(), today())
+
+
+    @instrument()
+    def get_available_rooms(self, check_in_date, check_out_date, guests: int = 1, offset: int = 0, limit: int | None = None) -> List[Room]:
+        check_in_date, check_out_date = cast_stay(check_in_date, check_out_date)
+        if guests < 1:
+            raise ValueError('A quantidade de hóspedes deve ser positiva')
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError('A paginação deve ser positiva')
+        rooms = Room.search_available(check_in_date, check_out_date, guests)
+        return list(islice(rooms, offset, None if limit is None else offset + limit))
+    
     
-    
\ No newline at end of file
+
+
+class InformationController(Controller):
+    def get_database_info(self) -> dict:
+        return {
+            'engine': get_storage_engine(),
+            'path': get_database_path(),
+            'counts': {model.table_name: model.count() for model in MODELS},
+        }
+
+
+    def vacuum(self) -> dict:
+        return get_connection().vacuum()
+
+
+    def get_metrics(self) -> dict:
+        return metrics.snapshot()
+
+
+    def get_caches(self) -> dict:
+        return metrics.caches()
+
+
+    def is_metrics_enabled(self) -> bool:
+        return metrics.is_enabled()
+
+
+    def toggle_metrics(self) -> bool:
+        metrics.disable() if metrics.is_enabled() else metrics.enable()
+        return metrics.is_enabled()
+
+
+    def reset_metrics(self) -> None:
+        metrics.reset()
+
+
+    def dump_metrics(self, file_path: str) -> dict:
+        return metrics.dump(file_path)
@@ -0,0 +1,1069 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from bisect import bisect_left
+from itertools import islice, groupby
+from datetime import date
+from os import path, stat, replace, fsync, remove
+from pickle import dump, load, UnpicklingError
+import sqlite3
+
+try:
+    from fcntl import flock, LOCK_EX, LOCK_UN
+except ImportError:
+    flock = None
+    import msvcrt
+
+from indexes import SecondaryIndex, UniqueIndex, RankedIndex, IntervalIndex, DailyIndex
+from exceptions import ModelNotFoundedException, UniqueConstraintException, StaleModelException
+from utils import date_to_ordinal
+from metrics import measure
+
+
+def load_tables(file_name) -> dict:
+    with measure('load_tables') as measurement, open(file_name, 'rb') as file:
+        tables = load(file)
+        measurement.bytes_read = file.tell()
+    return tables
+
+
+def save_tables(file_name, tables) -> None:
+    """
+    Writes the tables into a temporary file and atomically renames it over file_name
+
+    :param str file_name:
+    :param dict tables:
+    """
+    temporary_name = f'{file_name}.tmp'
+    with measure('save_tables') as measurement:
+        with open(temporary_name, 'wb') as file:
+            dump(tables, file)
+            file.flush()
+            fsync(file.fileno())
+            measurement.bytes_written = file.tell()
+        replace(temporary_name, file_name)
+
+
+def empty_tables() -> dict:
+    return { "clients": {}, "rooms": {}, "reservations": {} }
+
+
+def file_stamp(file_name: str) -> tuple | None:
+    """
+    Returns the (mtime, size) pair of a file, or None if it does not exist
+
+    :param str file_name:
+    :return tuple|None:
+    """
+    if not path.isfile(file_name):
+        return None
+    file_stat = stat(file_name)
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+class FileLock:
+    """
+    Reentrant advisory lock held on a file, shared between the processes using the same database
+    """
+    def __init__(self, file_name: str) -> None:
+        self.file_name = file_name
+        self._file = None
+        self._depth: int = 0
+
+
+    def __enter__(self):
+        if not self._depth:
+            self._file = open(self.file_name, 'a+b')
+            if flock:
+                flock(self._file.fileno(), LOCK_EX)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        self._depth += 1
+        return self
+
+
+    def __exit__(self, *exception) -> None:
+        self._depth -= 1
+        if not self._depth:
+            if flock:
+                flock(self._file.fileno(), LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+            self._file = None
+
+
+class Connection(ABC):
+    """
+    Storage backend behind Model. Rows are dicts with one key per column plus the deleted flag,
+    addressed by an integer id. The schema (columns, uniques, foreign keys, intervals and
+    calendars) is read from the model classes.
+    """
+    def __init__(self, database_path: str, models) -> None:
+        self.database_path = database_path
+        self.models: dict = {model.table_name: model for model in models}
+
+
+    @abstractmethod
+    def rows(self, table: str, include_deleted: bool = False):
+        """
+        Yields (id, row) for every row of the table in id order
+
+        :param str table:
+        :param bool include_deleted:
+        """
+        pass
+
+
+    def page(self, table: str, offset: int, limit: int) -> list:
+        """
+        Returns (id, row) for at most limit live rows of the table, skipping the first offset ones
+
+        :param str table:
+        :param int offset:
+        :param int limit:
+        :return list:
+        """
+        return list(islice(self.rows(table), offset, offset + limit))
+
+
+    def count(self, table: str) -> int:
+        """
+        Returns how many live rows the table holds
+
+        :param str table:
+        :return int:
+        """
+        return sum(1 for _ in self.rows(table))
+
+
+    @abstractmethod
+    def find(self, table: str, id: int) -> dict | None:
+        """
+        Returns the row stored under id, deleted or not, or None if there is none
+
+        :param str table:
+        :param int id:
+        :return dict|None:
+        """
+        pass
+
+
+    def find_many(self, table: str, ids) -> dict:
+        """
+        Returns {id: row} for the given ids that have a row stored, deleted or not
+
+        :param str table:
+        :param ids:
+        :return dict:
+        """
+        return {id: row for id in ids if (row := self.find(table, id)) is not None}
+
+
+    @abstractmethod
+    def insert(self, table: str, row: dict, id: int | None = None) -> int:
+        """
+        Stores a new row and returns its id. An explicit id is kept as long as no row, deleted or
+        not, is stored under it, otherwise a UniqueConstraintException is raised.
+
+        :param str table:
+        :param dict row:
+        :param int|None id: defaults to the next id of the table
+        :return int:
+        """
+        pass
+
+
+    @abstractmethod
+    def update(self, table: str, id: int, row: dict, expected_version: int | None = None) -> int:
+        """
+        Replaces the row stored under id and returns its new version. If expected_version is given
+        and the stored row has another version, raises StaleModelException instead.
+
+        :param str table:
+        :param int id:
+        :param dict row:
+        :param int|None expected_version:
+        :return int:
+        """
+        pass
+
+
+    @abstractmethod
+    def delete(self, table: str, id: int) -> None:
+        pass
+
+
+    @abstractmethod
+    def lookup(self, table: str, column: str, value) -> list:
+        """
+        Returns the sorted ids of the live rows whose column equals value
+
+        :param str table:
+        :param str column:
+        :param value:
+        :return list:
+        """
+        pass
+
+
+    def find_unique(self, table: str, column: str, value) -> int | None:
+        """
+        Returns the id of the live row whose unique column equals value, or None
+
+        :param str table:
+        :param str column:
+        :param value:
+        :return int|None:
+        """
+        ids: list = self.lookup(table, column, value)
+        return ids[0] if ids else None
+
+
+    def check_uniques(self, table: str, row: dict, id: int | None = None) -> None:
+        """
+        Raises UniqueConstraintException if another live row already holds a unique value of row
+
+        :param str table:
+        :param dict row:
+        :param int|None id: the id row is stored under, when updating
+        """
+        for column in self.models[table].uniques:
+            owner: int | None = self.find_unique(table, column, row.get(column))
+            if owner is not None and owner != id:
+                raise UniqueConstraintException(column, row.get(column))
+
+
+    @abstractmethod
+    def overlapping(self, table: str, name: str, group, start: int, end: int) -> list:
+        """
+        Returns the sorted ids of the live rows of the group whose interval, declared as name in
+        the model intervals, intersects the day ordinals [start, end)
+
+        :param str table:
+        :param str name:
+        :param group:
+        :param int start:
+        :param int end:
+        :return list:
+        """
+        pass
+
+
+    def overlaps(self, table: str, name: str, group, start: int, end: int) -> bool:
+        return bool(self.overlapping(table, name, group, start, end))
+
+
+    @abstractmethod
+    def busy_groups(self, table: str, name: str, start: int, end: int, groups=None) -> set:
+        """
+        Returns the groups of the interval declared as name in the model intervals holding a live
+        row that intersects the day ordinals [start, end), among the given groups when there are
+        some
+
+        :param str table:
+        :param str name:
+        :param int start:
+        :param int end:
+        :param groups: defaults to every group
+        :return set:
+        """
+        pass
+
+
+    @abstractmethod
+    def ranked(self, table: str, name: str, value):
+        """
+        Iterates the ids of the live rows whose group column, in the ranking declared as name in
+        the model rankings, is greater than or equal to value, ordered by the ranking columns and
+        then by id
+
+        :param str table:
+        :param str name:
+        :param value:
+        """
+        pass
+
+
+    @abstractmethod
+    def calendar(self, table: str, name: str, start: int, end: int):
+        """
+        Yields (day, {group: count}) for every day ordinal of [start, end] covered by a live row
+        of the calendar declared as name in the model calendars
+
+        :param str table:
+        :param str name:
+        :param int start:
+        :param int end:
+        """
+        pass
+
+
+    @abstractmethod
+    def transaction(self):
+        """
+        Context manager grouping every write made inside it into one atomic commit, rolled back
+        if the block raises. Nested transactions join the outermost one.
+        """
+        pass
+
+
+    @abstractmethod
+    def purge(self, table: str, ids) -> None:
+        """
+        Physically removes the rows stored under ids and frees the ids for new rows
+
+        :param str table:
+        :param ids:
+        """
+        pass
+
+
+    def vacuum(self) -> dict:
+        """
+        Physically removes the deleted rows, except the ones still referenced through a foreign
+        key by a kept row, and frees their ids. Ids are explicit keys, so the remaining rows and
+        the foreign keys pointing to them stay untouched. Returns how many rows were removed per
+        table.
+
+        :return dict:
+        """
+        with self.transaction():
+            tombstones: dict = {
+                table: {id: row for id, row in self.rows(table, include_deleted=True) if row['deleted']}
+                for table in self.models
+            }
+            kept: list = [(table, row) for table in self.models for _, row in self.rows(table)]
+            while kept:
+                table, row = kept.pop()
+                for column, target in self.models[table].foreign_keys.items():
+                    if (referenced := tombstones[target].pop(row.get(column), None)) is not None:
+                        kept.append((target, referenced))
+            for table, rows in tombstones.items():
+                if rows:
+                    self.purge(table, rows)
+        return {table: len(rows) for table, rows in tombstones.items()}
+
+
+    def insert_unless_overlapping(self, table: str, name: str, row: dict, id: int | None = None) -> int | None:
+        """
+        Inserts the row only if its interval, declared as name in the model intervals, intersects
+        no live row of its group. The check and the insert run in one transaction, so concurrent
+        callers can not both succeed. Returns the new id, or None if the interval is taken.
+
+        :param str table:
+        :param str name:
+        :param dict row:
+        :param int|None id: explicit id, as in insert
+        :return int|None:
+        """
+        group_column, start_column, end_column = self.models[table].intervals[name]
+        start, end = date_to_ordinal(row[start_column]), date_to_ordinal(row[end_column])
+        with self.transaction():
+            if self.overlaps(table, name, row[group_column], start, end):
+                return None
+            return self.insert(table, row, id)
+
+
+    @property
+    @abstractmethod
+    def sequence(self):
+        """
+        Returns a token that changes whenever the stored rows do
+        """
+        pass
+
+
+    def exists(self, table: str, id: int) -> bool:
+        """
+        Verify if a live row is stored under id
+
+        :param str table:
+        :param int id:
+        :return bool:
+        """
+        if table not in self.models:
+            return False
+        row = self.find(table, id)
+        return row is not None and not row['deleted']
+
+
+    def existing_ids(self, table: str, ids) -> set:
+        """
+        Returns which of the given ids belong to live rows of the table
+
+        :param str table:
+        :param ids:
+        :return set:
+        """
+        if table not in self.models:
+            return set()
+        return {id for id, row in self.find_many(table, ids).items() if not row['deleted']}
+
+
+class PickleConnection(Connection):
+    """
+    Keeps the tables in memory on top of a snapshot file and an append-only journal.
+
+    Every mutation is appended to the journal as a small record instead of rewriting the
+    snapshot. Once the journal reaches compact_every records it is folded into a new snapshot.
+
+    Each table maps explicit ids to rows. New rows take the lowest id freed by purge, or the
+    next never used one. The last version of every freed id is kept, so a row reusing it starts
+    above the version any stale reference to the purged row may hold.
+    """
+    SEQUENCE_KEY = '__sequence__'
+    FREE_IDS_KEY = '__free_ids__'
+    FREE_VERSIONS_KEY = '__free_versions__'
+    NEXT_IDS_KEY = '__next_ids__'
+
+    def __init__(self, database_path: str, models, migrations: list | None = None, compact_every: int = 1000) -> None:
+        super().__init__(database_path, models)
+        self.migrations: list = migrations or []
+        self.indexes: dict = {table: self._create_indexes(model) for table, model in self.models.items()}
+        self.journal_path = f'{database_path}.log'
+        self.compact_every = compact_every
+        self._tables: dict | None = None
+        self._snapshot_stamp: tuple | None = None
+        self._journal_offset: int = 0
+        self._journal_records: int = 0
+        self._sequence: int = 0
+        self._pending: list | None = None
+        self._free_ids: dict = {}
+        self._free_versions: dict = {}
+        self._next_ids: dict = {}
+        self._unordered: set = set()
+        self.lock: FileLock = FileLock(f'{database_path}.lock')
+
+
+    @staticmethod
+    def _create_indexes(model) -> dict:
+        indexes: list = [SecondaryIndex(column) for column in model.foreign_keys]
+        indexes.extend(UniqueIndex(column) for column in model.uniques)
+        indexes.extend(RankedIndex(name, *columns) for name, columns in model.rankings.items())
+        for name, columns in model.intervals.items():
+            indexes.append(IntervalIndex(name, *columns, cast=date_to_ordinal))
+        for name, columns in model.calendars.items():
+            indexes.append(DailyIndex(name, *columns, cast=date_to_ordinal))
+        return {index.name: index for index in indexes}
+
+
+    @property
+    def tables(self) -> dict:
+        return self.refresh()
+
+
+    def refresh(self) -> dict:
+        """
+        Returns the in-memory tables, reading only what changed on disk since the last access
+
+        :return dict:
+        """
+        if self._pending is not None:
+            return self._tables
+        snapshot_stamp = file_stamp(self.database_path)
+        if self._tables is None or snapshot_stamp != self._snapshot_stamp:
+            self._load(snapshot_stamp)
+        else:
+            journal_stamp = file_stamp(self.journal_path)
+            journal_size = journal_stamp[1] if journal_stamp else 0
+            if journal_size > self._journal_offset:
+                self._replay()
+            elif journal_size < self._journal_offset:
+                self._load(snapshot_stamp)
+        return self._tables
+
+
+    def _load(self, snapshot_stamp: tuple | None) -> None:
+        """
+        Reads the snapshot and the journal. When a migration changes the rows, the files are read
+        again under the lock, so writes made in between are kept, and the migrated rows are compacted
+
+        :param tuple|None snapshot_stamp:
+        """
+        self._read(snapshot_stamp)
+        if any([migration(self._tables) for migration in self.migrations]):
+            with self.lock:
+                self._read(file_stamp(self.database_path))
+                if any([migration(self._tables) for migration in self.migrations]):
+                    self._build_indexes()
+                    self.compact()
+
+
+    def _read(self, snapshot_stamp: tuple | None) -> None:
+        tables = load_tables(self.database_path) if snapshot_stamp else empty_tables()
+        self._sequence = tables.pop(self.SEQUENCE_KEY, 0)
+        free_ids: dict = tables.pop(self.FREE_IDS_KEY, {})
+        free_versions: dict = tables.pop(self.FREE_VERSIONS_KEY, {})
+        next_ids: dict = tables.pop(self.NEXT_IDS_KEY, {})
+        for table, rows in tables.items():
+            if isinstance(rows, list):
+                tables[table] = dict(enumerate(rows))
+        self._free_ids = {table: list(free_ids.get(table, [])) for table in tables}
+        self._free_versions = {table: dict(free_versions.get(table, {})) for table in tables}
+        self._next_ids = {table: next_ids.get(table, max(tables[table], default=-1) + 1) for table in tables}
+        self._unordered = set()
+        self._tables = tables
+        self._build_indexes()
+        self._snapshot_stamp = snapshot_stamp
+        self._journal_offset = 0
+        self._journal_records = 0
+        self._replay()
+
+
+    def _build_indexes(self) -> None:
+        for table, table_indexes in self.indexes.items():
+            for index in table_indexes.values():
+                index.build(self._tables[table])
+
+
+    def _replay(self) -> None:
+        """
+        Applies the journal records written after the current offset, stopping at a torn tail
+        """
+        if not path.isfile(self.journal_path):
+            return
+        with measure('journal.replay') as measurement, open(self.journal_path, 'rb') as journal:
+            journal.seek(self._journal_offset)
+            measurement.bytes_read = -self._journal_offset
+            while True:
+                try:
+                    sequence, operation, table, id, row = load(journal)
+                except (EOFError, UnpicklingError, ValueError, TypeError):
+                    break
+                if sequence > self._sequence:
+                    self._apply(operation, table, id, row)
+                    self._sequence = sequence
+                self._journal_offset = journal.tell()
+                self._journal_records += 1
+            measurement.bytes_read += self._journal_offset
+
+
+    def _apply(self, operation: str, table: str, id: int, row) -> None:
+        if operation == 'batch':
+            for record in row:
+                self._apply(*record)
+            return
+        rows: dict = self._tables[table]
+        table_indexes = self.indexes.get(table, {}).values()
+        if operation == 'purge':
+            free_ids: list = self._free_ids[table]
+            for id in row:
+                removed = rows.pop(id, None)
+                if removed is not None:
+                    self._free_versions[table][id] = removed.get('version', 0)
+                    if not removed.get('deleted'):
+                        for index in table_indexes:
+                            index.remove(id, removed)
+                position = bisect_left(free_ids, id)
+                if position == len(free_ids) or free_ids[position] != id:
+                    free_ids.insert(position, id)
+            return
+        match operation:
+            case 'insert':
+                free_ids: list = self._free_ids[table]
+                position = bisect_left(free_ids, id)
+                if position < len(free_ids) and free_ids[position] == id:
+                    del free_ids[position]
+                self._free_versions[table].pop(id, None)
+                if id + 1 < self._next_ids[table]:
+                    self._unordered.add(table)
+                self._next_ids[table] = max(self._next_ids[table], id + 1)
+                rows[id] = row
+            case 'update' | 'delete':
+                if not rows[id].get('deleted'):
+                    for index in table_indexes:
+                        index.remove(id, rows[id])
+                if operation == 'update':
+                    rows[id] = row
+                else:
+                    rows[id] = {**rows[id], 'deleted': True, 'version': rows[id].get('version', 0) + 1}
+        if not rows[id].get('deleted'):
+            for index in table_indexes:
+                index.add(id, rows[id])
+
+
+    def _write(self, operation: str, table: str, id: int, row: dict | None = None) -> None:
+        with self.lock:
+            self.refresh()
+            self._apply(operation, table, id, row)
+            if self._pending is not None:
+                self._pending.append((operation, table, id, row))
+            else:
+                self._append(operation, table, id, row)
+
+
+    def _append(self, operation: str, table: str | None, id: int | None, row) -> None:
+        self._sequence += 1
+        with measure('journal.append') as measurement, open(self.journal_path, 'ab') as journal:
+            journal.truncate(self._journal_offset)
+            dump((self._sequence, operation, table, id, row), journal)
+            measurement.bytes_written = journal.tell() - self._journal_offset
+            self._journal_offset = journal.tell()
+        self._journal_records += 1
+        if self._journal_records >= self.compact_every:
+            self.compact()
+
+
+    def insert(self, table: str, row: dict, id: int | None = None) -> int:
+        """
+        Stores a row under the lowest free id of the table, or under the explicit id, and returns
+        the id
+
+        :param str table:
+        :param dict row:
+        :param int|None id:
+        :return int:
+        """
+        with self.lock:
+            self.refresh()
+            if id is None:
+                free_ids: list = self._free_ids[table]
+                id = free_ids[0] if free_ids else self._next_ids[table]
+            elif id in self._tables[table]:
+                raise UniqueConstraintException('id', id)
+            self.check_uniques(table, row)
+            row['version'] = self._free_versions[table].get(id, 0) + 1
+            self._write('insert', table, id, row)
+        return id
+
+
+    def update(self, table: str, id: int, row: dict, expected_version: int | None = None) -> int:
+        with self.lock:
+            if (stored := self.tables[table].get(id)) is None:
+                raise ModelNotFoundedException(id)
+            version: int = stored.get('version', 0)
+            if expected_version is not None and expected_version != version:
+                raise StaleModelException(id)
+            self.check_uniques(table, row, id)
+            row['version'] = version + 1
+            self._write('update', table, id, row)
+        return version + 1
+
+
+    def delete(self, table: str, id: int) -> None:
+        """
+        Flags the row stored under id as deleted
+
+        :param str table:
+        :param int id:
+        """
+        with self.lock:
+            if id not in self.tables[table]:
+                raise ModelNotFoundedException(id)
+            self._write('delete', table, id)
+
+
+    def purge(self, table: str, ids) -> None:
+        self._write('purge', table, None, sorted(ids))
+
+
+    def vacuum(self) -> dict:
+        with self.lock:
+            removed: dict = super().vacuum()
+            self.compact()
+        return removed
+
+
+    def rows(self, table: str, include_deleted: bool = False):
+        rows: dict = self.tables[table]
+        if table in self._unordered:
+            rows = self._tables[table] = dict(sorted(rows.items()))
+            self._unordered.discard(table)
+        for id, row in rows.items():
+            if include_deleted or not row['deleted']:
+                yield id, row
+
+
+    def find(self, table: str, id: int) -> dict | None:
+        return self.tables[table].get(id)
+
+
+    def find_many(self, table: str, ids) -> dict:
+        rows: dict = self.tables[table]
+        return {id: row for id in ids if (row := rows.get(id)) is not None}
+
+
+    def find_unique(self, table: str, column: str, value) -> int | None:
+        return self.index(table, column).find(value)
+
+
+    def lookup(self, table: str, column: str, value) -> list:
+        if column in self.indexes[table]:
+            return self.index(table, column).lookup(value)
+        return [id for id, row in self.rows(table) if row.get(column) == value]
+
+
+    def overlapping(self, table: str, name: str, group, start: int, end: int) -> list:
+        return self.index(table, name).overlapping(group, start, end)
+
+
+    def overlaps(self, table: str, name: str, group, start: int, end: int) -> bool:
+        return self.index(table, name).overlaps(group, start, end)
+
+
+    def busy_groups(self, table: str, name: str, start: int, end: int, groups=None) -> set:
+        return self.index(table, name).busy_groups(start, end, groups)
+
+
+    def ranked(self, table: str, name: str, value):
+        return self.index(table, name).at_least(value)
+
+
+    def calendar(self, table: str, name: str, start: int, end: int):
+        return self.index(table, name).days(start, end)
+
+
+    @contextmanager
+    def transaction(self):
+        """
+        Holds the file lock for the whole block, buffers the journal records written inside it and
+        appends them as a single batch record when it ends. If the block raises, the tables are
+        reloaded from disk instead.
+        """
+        with self.lock:
+            self.refresh()
+            outermost: bool = self._pending is None
+            if outermost:
+                self._pending = []
+            try:
+                yield self
+            except BaseException:
+                if outermost:
+                    self._pending = None
+                    self.invalidate()
+                raise
+            if outermost:
+                records, self._pending = self._pending, None
+                if records:
+                    self._append('batch', None, None, records)
+
+
+    @property
+    def sequence(self) -> tuple:
+        """
+        Returns the number of the last mutation written and of the ones buffered by an open
+        transaction, which changes whenever the tables do
+
+        :return tuple:
+        """
+        self.refresh()
+        return self._sequence, len(self._pending or ())
+
+
+    def index(self, table: str, name: str):
+        """
+        Returns the up to date index registered under name for the table
+
+        :param str table:
+        :param str name:
+        """
+        self.refresh()
+        return self.indexes[table][name]
+
+
+    def compact(self) -> None:
+        """
+        Folds the journal into a new snapshot and discards the journal
+        """
+        tables = self.refresh()
+        save_tables(self.database_path, {
+            **tables,
+            self.SEQUENCE_KEY: self._sequence,
+            self.FREE_IDS_KEY: self._free_ids,
+            self.FREE_VERSIONS_KEY: self._free_versions,
+            self.NEXT_IDS_KEY: self._next_ids,
+        })
+        if path.isfile(self.journal_path):
+            remove(self.journal_path)
+        self._snapshot_stamp = file_stamp(self.database_path)
+        self._journal_offset = 0
+        self._journal_records = 0
+
+
+    def invalidate(self) -> None:
+        """
+        Drops the in-memory tables, forcing the next access to read the files
+        """
+        self._tables = None
+        self._snapshot_stamp = None
+
+
+class SqliteConnection(Connection):
+    """
+    Stores each model in a SQLite table derived from its columns, with indexes on its uniques,
+    foreign keys and intervals. Dates are stored as day ordinals.
+    """
+    TYPES: dict = {'int': 'INTEGER', 'float': 'REAL', 'str': 'TEXT', 'date': 'INTEGER', 'bool': 'INTEGER'}
+
+    def __init__(self, database_path: str, models) -> None:
+        super().__init__(database_path, models)
+        self.connection = sqlite3.connect(database_path, isolation_level=None, timeout=30)
+        self.statements: dict = {}
+        for table, model in self.models.items():
+            self._create_table(table, model)
+
+
+    def _create_table(self, table: str, model) -> None:
+        columns: list = [column for column, _ in model.columns]
+        definitions: str = ', '.join(f'{column} {self.TYPES[type]}' for column, type in model.columns)
+        self.connection.execute(f'CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, deleted INTEGER NOT NULL DEFAULT 0, version INTEGER NOT NULL DEFAULT 0, {definitions})')
+        if 'version' not in [name for _, name, *_ in self.connection.execute(f'PRAGMA table_info({table})')]:
+            self.connection.execute(f'ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS free_ids (table_name TEXT NOT NULL, id INTEGER NOT NULL, version INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (table_name, id))')
+        if 'version' not in [name for _, name, *_ in self.connection.execute('PRAGMA table_info(free_ids)')]:
+            self.connection.execute('ALTER TABLE free_ids ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+        for column in [*model.uniques, *model.foreign_keys]:
+            self.connection.execute(f'CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column})')
+        for name, interval_columns in model.intervals.items():
+            self.connection.execute(f'CREATE INDEX IF NOT EXISTS {table}_{name} ON {table} ({", ".join(interval_columns)})')
+        for name, (group_column, *rank_columns) in model.rankings.items():
+            self.connection.execute(f'CREATE INDEX IF NOT EXISTS {table}_{name} ON {table} ({", ".join(rank_columns)}, id, {group_column}, deleted)')
+        selected: str = ', '.join(['id', 'deleted', 'version', *columns])
+        self.statements[table] = {
+            'select': f'SELECT {selected} FROM {table} WHERE deleted = 0 ORDER BY id',
+            'select_all': f'SELECT {selected} FROM {table} ORDER BY id',
+            'page': f'SELECT {selected} FROM {table} WHERE deleted = 0 ORDER BY id LIMIT ? OFFSET ?',
+            'find': f'SELECT {selected} FROM {table} WHERE id = ?',
+            'find_many': f'SELECT {selected} FROM {table} WHERE id IN ({{}})',
+            'version': f'SELECT version FROM {table} WHERE id = ?',
+            'next_id': f"SELECT COALESCE((SELECT MIN(id) FROM free_ids WHERE table_name = '{table}'), (SELECT MAX(id) + 1 FROM {table}), 0)",
+            'insert': f'INSERT INTO {table} (id, version, deleted, {", ".join(columns)}) VALUES (?, ?, ?{", ?" * len(columns)})',
+            'purge': f'DELETE FROM {table} WHERE id = ?',
+            'free': f"INSERT OR REPLACE INTO free_ids (table_name, id, version) SELECT '{table}', id, version FROM {table} WHERE id = ?",
+            'update': f'UPDATE {table} SET version = ?, deleted = ?, {", ".join(f"{column} = ?" for column in columns)} WHERE id = ?',
+            'delete': f'UPDATE {table} SET deleted = 1, version = version + 1 WHERE id = ?',
+        }
+        for name, (group_column, *_) in model.calendars.items():
+            if self.connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f'{table}_{name}',)).fetchone():
+                continue
+            with self.transaction():
+                self.connection.execute(f'CREATE TABLE {table}_{name} (day INTEGER NOT NULL, {group_column} INTEGER NOT NULL, amount INTEGER NOT NULL, PRIMARY KEY (day, {group_column})) WITHOUT ROWID')
+                for _, row in self.rows(table):
+                    self._count_days(table, row, 1)
+
+
+    def _count_days(self, table: str, row: dict, sign: int) -> None:
+        """
+        Adds sign to the per-day counters of every calendar of the table over the days covered by row
+
+        :param str table:
+        :param dict row:
+        :param int sign:
+        """
+        for name, (group_column, start_column, end_column) in self.models[table].calendars.items():
+            group = row.get(group_column)
+            days: range = range(date_to_ordinal(row[start_column]), date_to_ordinal(row[end_column]))
+            self.connection.executemany(
+                f'INSERT INTO {table}_{name} (day, {group_column}, amount) VALUES (?, ?, ?) '
+                f'ON CONFLICT (day, {group_column}) DO UPDATE SET amount = amount + excluded.amount',
+                [(day, group, sign) for day in days]
+            )
+            if sign < 0:
+                self.connection.execute(f'DELETE FROM {table}_{name} WHERE {group_column} = ? AND day >= ? AND day < ? AND amount <= 0', (group, days.start, days.stop))
+
+
+    def _uncount_days(self, table: str, ids) -> None:
+        if self.models[table].calendars:
+            for row in self.find_many(table, ids).values():
+                if not row['deleted']:
+                    self._count_days(table, row, -1)
+
+
+    def _to_row(self, table: str, record: tuple) -> tuple:
+        row: dict = {'deleted': bool(record[1]), 'version': record[2]}
+        for (column, type), value in zip(self.models[table].columns, record[3:]):
+            row[column] = date.fromordinal(value) if type == 'date' and value is not None else value
+        return record[0], row
+
+
+    def _to_record(self, table: str, row: dict) -> list:
+        record: list = [int(bool(row.get('deleted', False)))]
+        for column, type in self.models[table].columns:
+            value = row.get(column)
+            record.append(date_to_ordinal(value) if type == 'date' and value is not None else value)
+        return record
+
+
+    def rows(self, table: str, include_deleted: bool = False):
+        statement: str = self.statements[table]['select_all' if include_deleted else 'select']
+        for record in self.connection.execute(statement):
+            yield self._to_row(table, record)
+
+
+    def page(self, table: str, offset: int, limit: int) -> list:
+        return [self._to_row(table, record) for record in self.connection.execute(self.statements[table]['page'], (limit, offset))]
+
+
+    def count(self, table: str) -> int:
+        return self.connection.execute(f'SELECT COUNT(*) FROM {table} WHERE deleted = 0').fetchone()[0]
+
+
+    def find(self, table: str, id: int) -> dict | None:
+        record = self.connection.execute(self.statements[table]['find'], (id,)).fetchone()
+        return self._to_row(table, record)[1] if record else None
+
+
+    def find_many(self, table: str, ids) -> dict:
+        ids = list({id for id in ids if isinstance(id, int)})
+        rows: dict = {}
+        for start in range(0, len(ids), 900):
+            batch: list = ids[start:start + 900]
+            statement: str = self.statements[table]['find_many'].format(', '.join('?' * len(batch)))
+            rows.update(self._to_row(table, record) for record in self.connection.execute(statement, batch))
+        return rows
+
+
+    def insert(self, table: str, row: dict, id: int | None = None) -> int:
+        with self.transaction():
+            self.check_uniques(table, row)
+            if id is None:
+                id = self.connection.execute(self.statements[table]['next_id']).fetchone()[0]
+            elif self.connection.execute(self.statements[table]['version'], (id,)).fetchone() is not None:
+                raise UniqueConstraintException('id', id)
+            freed = self.connection.execute('SELECT version FROM free_ids WHERE table_name = ? AND id = ?', (table, id)).fetchone()
+            row['version'] = (freed[0] if freed else 0) + 1
+            self.connection.execute('DELETE FROM free_ids WHERE table_name = ? AND id = ?', (table, id))
+            self.connection.execute(self.statements[table]['insert'], (id, row['version'], *self._to_record(table, row)))
+            if not row.get('deleted'):
+                self._count_days(table, row, 1)
+            return id
+
+
+    def update(self, table: str, id: int, row: dict, expected_version: int | None = None) -> int:
+        with self.transaction():
+            if (stored := self.connection.execute(self.statements[table]['version'], (id,)).fetchone()) is None:
+                raise ModelNotFoundedException(id)
+            version: int = stored[0]
+            if expected_version is not None and expected_version != version:
+                raise StaleModelException(id)
+            self.check_uniques(table, row, id)
+            row['version'] = version + 1
+            self._uncount_days(table, [id])
+            self.connection.execute(self.statements[table]['update'], (version + 1, *self._to_record(table, row), id))
+            if not row.get('deleted'):
+                self._count_days(table, row, 1)
+        return version + 1
+
+
+    def delete(self, table: str, id: int) -> None:
+        with self.transaction():
+            self._uncount_days(table, [id])
+            if self.connection.execute(self.statements[table]['delete'], (id,)).rowcount == 0:
+                raise ModelNotFoundedException(id)
+
+
+    def purge(self, table: str, ids) -> None:
+        ids = list(ids)
+        with self.transaction():
+            self._uncount_days(table, ids)
+            self.connection.executemany(self.statements[table]['free'], [(id,) for id in ids])
+            self.connection.executemany(self.statements[table]['purge'], [(id,) for id in ids])
+
+
+    def vacuum(self) -> dict:
+        removed: dict = super().vacuum()
+        if not self.connection.in_transaction:
+            self.connection.execute('VACUUM')
+        return removed
+
+
+    def import_rows(self, table: str, rows) -> int:
+        """
+        Inserts (id, row) pairs keeping their ids and deleted flags, returning how many were inserted
+
+        :param str table:
+        :param rows:
+        :return int:
+        """
+        rows = list(rows)
+        records: list = [(id, row.get('version', 0), *self._to_record(table, row)) for id, row in rows]
+        with self.transaction():
+            self.connection.executemany(self.statements[table]['insert'], records)
+            for _, row in rows:
+                if not row.get('deleted'):
+                    self._count_days(table, row, 1)
+        return len(records)
+
+
+    @contextmanager
+    def transaction(self):
+        outermost: bool = not self.connection.in_transaction
+        if outermost:
+            self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield self
+        except BaseException:
+            if outermost:
+                self.connection.execute('ROLLBACK')
+            raise
+        if outermost:
+            self.connection.execute('COMMIT')
+
+
+    def _column(self, table: str, column: str) -> str:
+        if column not in (name for name, _ in self.models[table].columns):
+            raise KeyError(column)
+        return column
+
+
+    def lookup(self, table: str, column: str, value) -> list:
+        value = date_to_ordinal(value) if isinstance(value, date) else value
+        statement: str = f'SELECT id FROM {table} WHERE deleted = 0 AND {self._column(table, column)} = ? ORDER BY id'
+        return [id for id, in self.connection.execute(statement, (value,))]
+
+
+    def overlapping(self, table: str, name: str, group, start: int, end: int) -> list:
+        group_column, start_column, end_column = self.models[table].intervals[name]
+        statement: str = (
+            f'SELECT id FROM {table} WHERE deleted = 0 AND {group_column} = ? AND {start_column} < ? '
+            f'AND MAX({end_column}, {start_column} + 1) > ? ORDER BY id'
+        )
+        return [id for id, in self.connection.execute(statement, (group, max(end, start + 1), start))]
+
+
+    def busy_groups(self, table: str, name: str, start: int, end: int, groups=None) -> set:
+        group_column, start_column, end_column = self.models[table].intervals[name]
+        statement: str = (
+            f'SELECT DISTINCT {group_column} FROM {table} WHERE deleted = 0 AND {start_column} < ? '
+            f'AND MAX({end_column}, {start_column} + 1) > ?'
+        )
+        parameters: tuple = (max(end, start + 1), start)
+        if groups is None:
+            return {group for group, in self.connection.execute(statement, parameters)}
+        groups = list(groups)
+        busy: set = set()
+        for position in range(0, len(groups), 900):
+            batch: list = groups[position:position + 900]
+            busy.update(group for group, in self.connection.execute(f'{statement} AND {group_column} IN ({", ".join("?" * len(batch))})', (*parameters, *batch)))
+        return busy
+
+
+    def ranked(self, table: str, name: str, value, batch_size: int = 256):
+        """
+        Walks the ranking index in batches, each one starting after the last row of the previous
+        one, so no cursor stays open between the ids yielded
+        """
+        group_column, *rank_columns = self.models[table].rankings[name]
+        ordered: str = ', '.join([*rank_columns, 'id'])
+        statement: str = f'SELECT {ordered} FROM {table} INDEXED BY {table}_{name} WHERE deleted = 0 AND {group_column} >= ? {{}}ORDER BY {ordered} LIMIT {batch_size}'
+        after: str = f'AND ({ordered}) > ({", ".join("?" * (len(rank_columns) + 1))}) '
+        records: list = self.connection.execute(statement.format(''), (value,)).fetchall()
+        while records:
+            yield from (record[-1] for record in records)
+            if len(records) < batch_size:
+                return
+            records = self.connection.execute(statement.format(after), (value, *records[-1])).fetchall()
+
+
+    def calendar(self, table: str, name: str, start: int, end: int):
+        group_column: str = self.models[table].calendars[name][0]
+        statement: str = f'SELECT day, {group_column}, amount FROM {table}_{name} WHERE day BETWEEN ? AND ? ORDER BY day'
+        for day, records in groupby(self.connection.execute(statement, (start, end)), key=lambda record: record[0]):
+            yield day, {group: amount for _, group, amount in records}
+
+
+    @property
+    def sequence(self) -> tuple:
+        return self.connection.execute('PRAGMA data_version').fetchone()[0], self.connection.total_changes
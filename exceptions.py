@@ -1,3 +1,6 @@
+from utils import translate_column_name
+
+
 class ReserveRoomAlreadyReservedException(Exception):
     def __init__(self, room_number: int):
         self.message = f'O quarto número {room_number} está reservado no momento!'
@@ -8,6 +11,16 @@ class ReserveRoomAlreadyReservedException(Exception):
         return self.message
     
 
+class ReserveRoomUnavailableException(Exception):
+    def __init__(self, room_number: int, check_in_date, check_out_date):
+        self.message = f'O quarto número {room_number} já está reservado entre {check_in_date} e {check_out_date}!'
+        super().__init__(self.message)
+
+    
+    def __str__(self):
+        return self.message
+    
+
 class ModelNotFoundedException(Exception):
     def __init__(self, id: int):
         self.message = f'Nenhum registro com o ID {id} foi encontrado'
@@ -15,4 +28,55 @@ class ModelNotFoundedException(Exception):
 
     
     def __str__(self) -> str:
-        return self.message
\ No newline at end of file
+        return self.message
+    
+
+class MissingDependencyException(Exception):
+    def __init__(self, package: str):
+        self.message = f'O pacote {package} precisa estar instalado para esta operação'
+        super().__init__(self.message)
+
+    
+    def __str__(self) -> str:
+        return self.message
+    
+
+class UniqueConstraintException(Exception):
+    def __init__(self, column: str, value):
+        self.message = f'Já existe um registro com {translate_column_name(column)} igual a {value}'
+        super().__init__(self.message)
+
+    
+    def __str__(self) -> str:
+        return self.message
+    
+
+class ValidationException(Exception):
+    def __init__(self, errors: list):
+        self.errors = errors
+        self.message = 'Os seguintes erros foram encontrados: ' + '; '.join(errors)
+        super().__init__(self.message)
+
+    
+    def __str__(self) -> str:
+        return self.message
+    
+
+class StaleModelException(Exception):
+    def __init__(self, id: int):
+        self.message = f'O registro com o ID {id} foi alterado em outro terminal. Consulte-o novamente antes de editar'
+        super().__init__(self.message)
+
+    
+    def __str__(self) -> str:
+        return self.message
+    
+
+class DatabaseNotEmptyException(Exception):
+    def __init__(self, path: str, tables: list):
+        self.message = f'O banco de dados {path} já possui registros em {", ".join(tables)}. Informe um arquivo novo como destino'
+        super().__init__(self.message)
+
+    
+    def __str__(self) -> str:
+        return self.message
@@ -0,0 +1,153 @@
+import csv
+import json
+from argparse import ArgumentParser
+from typing import Type
+
+from models import Model, Client, Room, Reservation, transaction
+from controllers import CrudController, ClientController, RoomController, ReservationController
+from validations import Request, ClientRequest, RoomRequest, ReservationRequest
+from utils import chunks, format_value, translate_column_name
+
+
+ENTITIES: dict = {
+    'clients': (Client, ClientController, ClientRequest),
+    'rooms': (Room, RoomController, RoomRequest),
+    'reservations': (Reservation, ReservationController, ReservationRequest),
+}
+
+
+def read_rows(file_path: str):
+    """
+    Yields the rows of a CSV file (by extension) or of a JSON Lines file, one at a time
+
+    :param str file_path:
+    """
+    with open(file_path, newline='', encoding='utf-8') as file:
+        if file_path.lower().endswith('.csv'):
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class Importer:
+    """
+    Streams a file into a model in chunks. Every chunk is validated at once by the model's Request
+    and saved through its controller; rejected rows are written to a side file with the reasons.
+    Rows keep the id they were exported with, so the foreign keys of an export imported into an
+    empty database (clients and rooms before reservations) still point to the same rows. Rows
+    without an id get the next free one.
+    """
+    def __init__(self, entity: str, chunk_size: int = 500) -> None:
+        model, controller, request = ENTITIES[entity]
+        self.model: Type[Model] = model
+        self.controller: CrudController = controller(model)
+        self.request: Request = request()
+        self.chunk_size = chunk_size
+
+
+    def cast_row(self, row: dict) -> tuple:
+        """
+        Returns the row with each column cast to its declared type, and the cast errors. Texts are
+        parsed and JSON numbers are converted between int and float columns; the id, when the file
+        has one, is cast too.
+
+        :param dict row:
+        :return tuple:
+        """
+        data: dict = {}
+        errors: list = []
+        if (id := row.get('id')) not in (None, ''):
+            try:
+                data['id'] = int(id)
+                if data['id'] < 0:
+                    raise ValueError(id)
+            except (TypeError, ValueError):
+                errors.append(f'O campo {translate_column_name("id")} possui um valor inválido')
+        for column, type in self.model.columns:
+            value = row.get(column)
+            if value == '':
+                value = None
+            elif isinstance(value, str) or (type in ('int', 'float') and isinstance(value, (int, float)) and not isinstance(value, bool)):
+                try:
+                    if type == 'int' and isinstance(value, float) and not value.is_integer():
+                        raise ValueError(value)
+                    value = Request.cast_data_type(type, value)
+                except (ValueError, OverflowError):
+                    errors.append(f'O campo {translate_column_name(column)} possui um valor inválido')
+            data[column] = value
+        return data, errors
+
+
+    def import_file(self, file_path: str, rejected_path: str | None = None) -> dict:
+        """
+        Imports every valid row of the file, returning how many rows were imported and rejected
+
+        :param str file_path:
+        :param str|None rejected_path: defaults to <file_path>.rejected.jsonl
+        :return dict:
+        """
+        counts: dict = {'imported': 0, 'rejected': 0}
+        with open(rejected_path or f'{file_path}.rejected.jsonl', 'w', encoding='utf-8') as rejected:
+            line: int = 0
+            for chunk in chunks(read_rows(file_path), self.chunk_size):
+                casts: list = [self.cast_row(row) for row in chunk]
+                ids: list = [data.pop('id', None) for data, _ in casts]
+                validations: list = self.request.validate_many([data for data, _ in casts], 'create')
+                with transaction():
+                    for row, (data, errors), id, validation in zip(chunk, casts, ids, validations):
+                        line += 1
+                        errors = errors or validation
+                        if not errors:
+                            try:
+                                self.controller.create(data, id)
+                            except Exception as e:
+                                errors = [str(e)]
+                        if errors:
+                            rejected.write(json.dumps({'line': line, 'row': row, 'errors': errors}, ensure_ascii=False) + '\n')
+                            counts['rejected'] += 1
+                        else:
+                            counts['imported'] += 1
+        return counts
+
+
+def export_file(entity: str, file_path: str) -> int:
+    """
+    Streams the live rows of the entity into a CSV file (by extension) or a JSON Lines file,
+    returning how many rows were written
+
+    :param str entity:
+    :param str file_path:
+    :return int:
+    """
+    model: Type[Model] = ENTITIES[entity][0]
+    fields: list = ['id', *(column for column, _ in model.columns)]
+    count: int = 0
+    with open(file_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fields) if file_path.lower().endswith('.csv') else None
+        if writer:
+            writer.writeheader()
+        for instance in model.iter_all():
+            row: dict = {field: format_value(getattr(instance, field)) for field in fields}
+            if writer:
+                writer.writerow(row)
+            else:
+                file.write(json.dumps(row, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Importa ou exporta clientes, quartos e reservas em CSV ou JSON Lines')
+    parser.add_argument('operation', choices=['import', 'export'])
+    parser.add_argument('entity', choices=list(ENTITIES))
+    parser.add_argument('file')
+    parser.add_argument('--rejected', help='arquivo com as linhas rejeitadas na importação')
+    parser.add_argument('--chunk-size', type=int, default=500)
+    arguments = parser.parse_args()
+    if arguments.operation == 'import':
+        counts: dict = Importer(arguments.entity, arguments.chunk_size).import_file(arguments.file, arguments.rejected)
+        print(f'{counts["imported"]} registros importados, {counts["rejected"]} rejeitados')
+    else:
+        print(f'{export_file(arguments.entity, arguments.file)} registros exportados')
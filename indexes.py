@@ -0,0 +1,283 @@
+from bisect import bisect_left, insort
+from heapq import merge
+
+
+class SecondaryIndex:
+    """
+    Maps each value of a column to the ids of the live rows holding it
+    """
+    def __init__(self, column: str) -> None:
+        self.name = column
+        self.column = column
+        self._ids: dict = {}
+
+
+    def build(self, rows: dict) -> None:
+        self._ids = {}
+        for id, row in rows.items():
+            if not row.get('deleted'):
+                self.add(id, row)
+
+
+    def add(self, id: int, row: dict) -> None:
+        self._ids.setdefault(row.get(self.column), set()).add(id)
+
+
+    def remove(self, id: int, row: dict) -> None:
+        value = row.get(self.column)
+        if (ids := self._ids.get(value)) is not None:
+            ids.discard(id)
+            if not ids:
+                del self._ids[value]
+
+
+    def lookup(self, value) -> list:
+        """
+        Returns the sorted ids of the rows whose column equals value
+
+        :param value:
+        :return list:
+        """
+        return sorted(self._ids.get(value, ()))
+
+
+class UniqueIndex(SecondaryIndex):
+    """
+    Hash index over a column whose live values must not repeat
+    """
+    def find(self, value) -> int | None:
+        """
+        Returns the id of the live row holding value, or None
+
+        :param value:
+        :return int|None:
+        """
+        ids = self._ids.get(value)
+        return min(ids) if ids else None
+
+
+class RankedIndex:
+    """
+    Groups the live rows by a column, keeping each group sorted by the ranking columns, so the rows
+    of every group at or above a value can be merged in ranking order without sorting them all
+    """
+    def __init__(self, name: str, group_column: str, *rank_columns: str) -> None:
+        self.name = name
+        self.group_column = group_column
+        self.rank_columns = rank_columns
+        self._groups: dict = {}
+
+
+    def build(self, rows: dict) -> None:
+        self._groups = {}
+        for id, row in rows.items():
+            if not row.get('deleted'):
+                self.add(id, row)
+
+
+    def _entry(self, id: int, row: dict) -> tuple:
+        return (*(row.get(column) for column in self.rank_columns), id)
+
+
+    def add(self, id: int, row: dict) -> None:
+        insort(self._groups.setdefault(row.get(self.group_column), []), self._entry(id, row))
+
+
+    def remove(self, id: int, row: dict) -> None:
+        group = row.get(self.group_column)
+        if (entries := self._groups.get(group)) is None:
+            return
+        entry: tuple = self._entry(id, row)
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+            if not entries:
+                del self._groups[group]
+
+
+    def at_least(self, value):
+        """
+        Yields the ids of the rows whose group column is greater than or equal to value, ordered
+        by the ranking columns and then by id
+
+        :param value:
+        """
+        groups: list = [entries for group, entries in self._groups.items() if group is not None and group >= value]
+        for entry in merge(*groups):
+            yield entry[-1]
+
+
+class IntervalList:
+    """
+    Half-open [start, end) intervals sorted by start, alongside the running maximum of their ends
+    """
+    def __init__(self) -> None:
+        self.intervals: list = []
+        self.max_ends: list = []
+
+
+    def _refresh_max_ends(self, position: int) -> None:
+        del self.max_ends[position:]
+        current = self.max_ends[-1] if self.max_ends else None
+        for _, end, _ in self.intervals[position:]:
+            current = end if current is None else max(current, end)
+            self.max_ends.append(current)
+
+
+    def insert(self, interval: tuple) -> None:
+        position = bisect_left(self.intervals, interval)
+        self.intervals.insert(position, interval)
+        self._refresh_max_ends(position)
+
+
+    def remove(self, interval: tuple) -> None:
+        position = bisect_left(self.intervals, interval)
+        if position < len(self.intervals) and self.intervals[position] == interval:
+            del self.intervals[position]
+            self._refresh_max_ends(position)
+
+
+    def overlaps(self, start: int, end: int) -> bool:
+        position = bisect_left(self.intervals, (end,))
+        return position > 0 and self.max_ends[position - 1] > start
+
+
+    def overlapping(self, start: int, end: int) -> list:
+        position = bisect_left(self.intervals, (end,)) - 1
+        ids: list = []
+        while position >= 0 and self.max_ends[position] > start:
+            if self.intervals[position][1] > start:
+                ids.append(self.intervals[position][2])
+            position -= 1
+        return sorted(ids)
+
+
+class IntervalIndex:
+    """
+    Groups the [start, end) intervals of the live rows by a column, answering overlap queries by bisection
+    """
+    def __init__(self, name: str, group_column: str, start_column: str, end_column: str, cast=None) -> None:
+        self.name = name
+        self.group_column = group_column
+        self.start_column = start_column
+        self.end_column = end_column
+        self.cast = cast or (lambda value: value)
+        self._groups: dict = {}
+
+
+    def build(self, rows: dict) -> None:
+        self._groups = {}
+        for id, row in rows.items():
+            if not row.get('deleted'):
+                self.add(id, row)
+
+
+    def _interval(self, id: int, row: dict) -> tuple:
+        start = self.cast(row[self.start_column])
+        return start, max(self.cast(row[self.end_column]), start + 1), id
+
+
+    def add(self, id: int, row: dict) -> None:
+        self._groups.setdefault(row.get(self.group_column), IntervalList()).insert(self._interval(id, row))
+
+
+    def remove(self, id: int, row: dict) -> None:
+        if (intervals := self._groups.get(row.get(self.group_column))) is not None:
+            intervals.remove(self._interval(id, row))
+
+
+    def overlaps(self, group, start: int, end: int) -> bool:
+        """
+        Verify if any interval of the group intersects [start, end)
+
+        :param group:
+        :param int start:
+        :param int end:
+        :return bool:
+        """
+        intervals = self._groups.get(group)
+        return intervals is not None and intervals.overlaps(start, max(end, start + 1))
+
+
+    def overlapping(self, group, start: int, end: int) -> list:
+        """
+        Returns the sorted ids of the rows of the group whose interval intersects [start, end)
+
+        :param group:
+        :param int start:
+        :param int end:
+        :return list:
+        """
+        intervals = self._groups.get(group)
+        return intervals.overlapping(start, max(end, start + 1)) if intervals is not None else []
+
+
+    def busy_groups(self, start: int, end: int, groups=None) -> set:
+        """
+        Returns the groups holding at least one interval that intersects [start, end), looking
+        only at the given groups when there are some
+
+        :param int start:
+        :param int end:
+        :param groups: defaults to every group
+        :return set:
+        """
+        end = max(end, start + 1)
+        if groups is None:
+            return {group for group, intervals in self._groups.items() if intervals.overlaps(start, end)}
+        return {group for group in groups if (intervals := self._groups.get(group)) is not None and intervals.overlaps(start, end)}
+
+
+
+class DailyIndex:
+    """
+    Counts, for each day, the live rows whose [start, end) interval covers it, grouped by a column
+    """
+    def __init__(self, name: str, group_column: str, start_column: str, end_column: str, cast=None) -> None:
+        self.name = name
+        self.group_column = group_column
+        self.start_column = start_column
+        self.end_column = end_column
+        self.cast = cast or (lambda value: value)
+        self._days: dict = {}
+
+
+    def build(self, rows: dict) -> None:
+        self._days = {}
+        for id, row in rows.items():
+            if not row.get('deleted'):
+                self.add(id, row)
+
+
+    def _covered_days(self, row: dict) -> range:
+        return range(self.cast(row[self.start_column]), self.cast(row[self.end_column]))
+
+
+    def add(self, id: int, row: dict) -> None:
+        group = row.get(self.group_column)
+        for day in self._covered_days(row):
+            groups: dict = self._days.setdefault(day, {})
+            groups[group] = groups.get(group, 0) + 1
+
+
+    def remove(self, id: int, row: dict) -> None:
+        group = row.get(self.group_column)
+        for day in self._covered_days(row):
+            groups: dict = self._days[day]
+            groups[group] -= 1
+            if not groups[group]:
+                del groups[group]
+                if not groups:
+                    del self._days[day]
+
+
+    def days(self, start: int, end: int):
+        """
+        Yields (day, {group: count}) for every day of [start, end] covered by at least one row
+
+        :param int start:
+        :param int end:
+        """
+        for day in range(start, end + 1):
+            if (groups := self._days.get(day)) is not None:
+                yield day, groups
@@ -1,3 +1,4 @@
+from os import environ
 from pprint import pprint
 from typing import Type, List
 
@@ -6,16 +7,17 @@ from tabulate import tabulate
 from models import Model, Room
 from controllers import Controller
 from validations import Request
-from utils import translate_column_name, number_format
+from utils import translate_column_name, number_format, format_value, format_date, cast_date
 
 
 
 class CliInterface:
-    def __init__(self, module: str, model: Type[Model], controller: Controller, request: Request):
+    def __init__(self, module: str, model: Type[Model], controller: Controller, request: Request, page_size: int | None = None):
         self.module = module
         self.model = model
         self.controller = controller
         self.request = request
+        self.page_size = page_size or int(environ.get('PYHOTEL_PAGE_SIZE', 20))
 
     def show_message(self, message: str, wait_for_next_action: bool = False) -> None:
         print(message)
@@ -29,6 +31,35 @@ class CliInterface:
 
     def read_line(self, message: str) -> str:
         return input(message)
+
+
+    def show_pages(self, header: list, fetch_page, total: int) -> None:
+        """
+        Shows a table one page at a time, fetching only the rows of the visible page
+
+        :param list header:
+        :param fetch_page: function receiving (offset, limit) and returning the rows of a page
+        :param int total: number of rows of every page together
+        """
+        pages: int = max(1, -(-total // self.page_size))
+        number: int = 1
+        while True:
+            self.show_table([header, *fetch_page((number - 1) * self.page_size, self.page_size)], False)
+            if pages == 1:
+                self.show_message(f'{total} registro(s)', True)
+                return
+            answer: str = self.read_line(f'Página {number} de {pages} ({total} registros). <Enter> próxima, A anterior, número da página ou S para sair: ').strip().lower()
+            match answer:
+                case 's':
+                    return
+                case 'a':
+                    number = max(1, number - 1)
+                case '':
+                    if number == pages:
+                        return
+                    number += 1
+                case _ if answer.isdigit():
+                    number = min(max(1, int(answer)), pages)
     
 
     def show_crud_options(self) -> None:
@@ -53,9 +84,26 @@ class CliInterface:
         1 - Relatório de receitas
         2 - Relatório de quartos ocupados
         3 - Relatório de quartos desocupados
+        4 - Relatório de receitas e ocupação por período
+        5 - Busca de quartos disponíveis
         ''')
 
     
+    def show_information_options(self) -> None:
+        print(f'''
+        ###########################
+                Informações
+        ###########################
+                
+        1 - Dados do banco de dados
+        2 - Métricas de desempenho
+        3 - Exportar métricas (JSON)
+        4 - Zerar métricas
+        5 - {'Desativar' if self.controller.is_metrics_enabled() else 'Ativar'} métricas
+        6 - Remover definitivamente os registros deletados
+        ''')
+
+
     def choose_crud_options(self) -> None:
         match int(self.read_line('Escolha a operação: ')):
             case 1:
@@ -78,16 +126,40 @@ class CliInterface:
                 self.rooms_currently_reserved_option()
             case 3:
                 self.rooms_currently_free_option()
+            case 4:
+                self.period_report_option()
+            case 5:
+                self.available_rooms_option()
             case _:
                 self.show_message('Opção inválida!', True)
 
     
-    def validate_input(self, data: dict, mode: str = 'create'):
+    def choose_information_options(self) -> None:
+        match int(self.read_line('Escolha a operação: ')):
+            case 1:
+                self.database_info_option()
+            case 2:
+                self.metrics_option()
+            case 3:
+                self.dump_metrics_option()
+            case 4:
+                self.controller.reset_metrics()
+                self.show_message('Métricas zeradas!', True)
+            case 5:
+                enabled: bool = self.controller.toggle_metrics()
+                self.show_message(f'Métricas {"ativadas" if enabled else "desativadas"}!', True)
+            case 6:
+                self.vacuum_option()
+            case _:
+                self.show_message('Opção inválida!', True)
+
+    
+    def validate_input(self, data: dict, mode: str = 'create', model_id: int | None = None):
         for column in self.model.columns:
             answer = input(f'{translate_column_name(column[0])}: ')
             if mode == 'create' or not (answer is None or answer == ''):
                 data[column[0]] = Request.cast_data_type(column[1], answer)
-        errors: list = self.request.validate(data, mode)
+        errors: list = self.request.validate(data, mode, model_id)
         if errors:
             self.show_message(f'Algo deu errado! Os seguintes erros foram encontrados:')
             for index, error in enumerate(errors, 1):
@@ -111,18 +183,11 @@ class CliInterface:
 
     def find_all_option(self):
         self.show_message(f'# Lista de {self.module}s\n')
-        models: list = self.controller.find_all()
-        data = [['ID']]
-        for column in self.model.columns:
-            data[0].append(translate_column_name(column[0]))
-        for index, model in enumerate(models):
-            if not model.deleted:
-                row = [str(index)]
-                for column in model.columns:
-                    if column[0] not in self.model.invisible_columns:
-                        row.append(getattr(model, column[0]))
-                data.append(row)
-        self.show_table(data)
+        columns: list = [column for column, _ in self.model.columns if column not in self.model.invisible_columns]
+        header: list = ['ID', *(translate_column_name(column) for column in columns)]
+        def fetch_page(offset: int, limit: int) -> list:
+            return [[str(model.id), *(format_value(getattr(model, column)) for column in columns)] for model in self.controller.page(offset, limit)]
+        self.show_pages(header, fetch_page, self.controller.count())
 
 
     def update_option(self):
@@ -130,7 +195,7 @@ class CliInterface:
             data: dict = {}
             model: Model = self.controller.find(int(self.read_line(f'Informe o Identificador (ID) do registro que deseja atualizar: ')))
             self.show_message(f'Registro encontrado: \n{model}\n\n', True)
-            if self.validate_input(data, 'update'):
+            if self.validate_input(data, 'update', model.id):
                 model = self.controller.update(data, model)
                 self.show_message(f'\n{model}\n\n{self.module} atualizado com sucesso!', True)
             else:
@@ -154,22 +219,104 @@ class CliInterface:
         table: list = [['ID', 'Receita']]
         data: dict = self.controller.get_total_balance()
         for reservation in data['reservations']:
-            table.append([reservation.id, f'R$ {number_format(reservation.get_balance())}'])
+            table.append([reservation.id, f'R$ {number_format(data['balances'][reservation.id])}'])
         self.show_table(table, False)
         self.show_message(f'Receita total: R$ {number_format(data['total_balance'])}', True)
     
     
+    def period_report_option(self):
+        try:
+            start_date = cast_date(self.read_line('Data inicial (dd/mm/aaaa): '))
+            end_date = cast_date(self.read_line('Data final (dd/mm/aaaa): '))
+        except ValueError:
+            return self.show_message('Data inválida!', True)
+        match self.read_line('Agrupar por (1 - Dia, 2 - Mês, 3 - Quarto): '):
+            case '2':
+                group_by, header = 'month', 'Mês'
+            case '3':
+                group_by, header = 'room', 'Identificação do Quarto'
+            case _:
+                group_by, header = 'day', 'Dia'
+        self.show_message(f'Receitas e ocupação de {format_date(start_date)} a {format_date(end_date)}')
+        table: list = [[header, 'Receita', 'Diárias', 'Taxa de ocupação']]
+        for row in self.controller.get_period_report(start_date, end_date, group_by):
+            match group_by:
+                case 'month':
+                    period = row['period'].strftime('%m/%Y')
+                case 'room':
+                    period = row['period']
+                case _:
+                    period = format_date(row['period'])
+            table.append([period, f'R$ {number_format(row['revenue'])}', row['nights'], f'{number_format(row['occupancy_rate'] * 100)}%'])
+        self.show_table(table)
+    
+    
+    def database_info_option(self):
+        info: dict = self.controller.get_database_info()
+        self.show_message(f'Armazenamento: {info["engine"]} ({info["path"]})')
+        table: list = [['Tabela', 'Registros']]
+        for table_name, count in info['counts'].items():
+            table.append([table_name, count])
+        self.show_table(table)
+
+
+    def vacuum_option(self):
+        if self.read_line('Os registros deletados serão removidos e seus IDs reaproveitados. Confirmar? (S/N): ').strip().lower() != 's':
+            return
+        removed: dict = self.controller.vacuum()
+        table: list = [['Tabela', 'Registros removidos']]
+        for table_name, count in removed.items():
+            table.append([table_name, count])
+        self.show_table(table)
+
+
+    def metrics_option(self):
+        if not self.controller.is_metrics_enabled():
+            self.show_message('As métricas estão desativadas. Ative-as neste módulo ou defina PYHOTEL_METRICS=1.')
+        table: list = [['Operação', 'Chamadas', 'Tempo total (ms)', 'Tempo médio (ms)', 'Bytes lidos', 'Bytes escritos']]
+        for name, metric in self.controller.get_metrics().items():
+            table.append([
+                name,
+                metric['count'],
+                number_format(metric['seconds'] * 1000),
+                number_format(metric['mean_seconds'] * 1000),
+                metric['bytes_read'],
+                metric['bytes_written'],
+            ])
+        self.show_table(table, False)
+        self.show_message('Caches de datas')
+        table = [['Função', 'Acertos', 'Falhas', 'Ocupação', 'Tamanho máximo']]
+        for name, cache in self.controller.get_caches().items():
+            table.append([name, cache['hits'], cache['misses'], cache['currsize'], cache['maxsize']])
+        self.show_table(table)
+
+
+    def dump_metrics_option(self):
+        file_path: str = self.read_line('Arquivo de destino (metrics.json): ') or 'metrics.json'
+        try:
+            metrics: dict = self.controller.dump_metrics(file_path)
+            self.show_message(f'{len(metrics)} operações exportadas para {file_path}', True)
+        except OSError as e:
+            self.show_message(f'Um erro ocorreu: {e}', True)
+
+
+    def available_rooms_option(self):
+        try:
+            check_in_date = cast_date(self.read_line('Data de Check-In (dd/mm/aaaa): '))
+            check_out_date = cast_date(self.read_line('Data de Check-Out (dd/mm/aaaa): '))
+            guests: int = int(self.read_line('Quantidade de hóspedes: '))
+            rooms: List[Room] = self.controller.get_available_rooms(check_in_date, check_out_date, guests)
+        except ValueError as e:
+            return self.show_message(f'Um erro ocorreu: {e}', True)
+        self._show_rooms(f'Quartos disponíveis de {format_date(check_in_date)} a {format_date(check_out_date)} para {guests} hóspede(s)', rooms)
+    
+    
     def _show_rooms(self, message: str, rooms: List[Room]):
         self.show_message(message)
-        table: list = [[translate_column_name(column[0]) for column in Room.columns]]
-        table[0].insert(0, 'ID')
-        rooms: List[Room] = rooms
-        for id, room in enumerate(rooms):
-            row: list = [id]
-            for column in room.columns:
-                row.append(getattr(room, column[0]))
-            table.append(row)
-        self.show_table(table)
+        header: list = ['ID', *(translate_column_name(column[0]) for column in Room.columns)]
+        def fetch_page(offset: int, limit: int) -> list:
+            return [[room.id, *(getattr(room, column[0]) for column in room.columns)] for room in rooms[offset:offset + limit]]
+        self.show_pages(header, fetch_page, len(rooms))
     
     
     def rooms_currently_reserved_option(self):
@@ -2,7 +2,7 @@ from platform import system as get_os
 from os import system
 
 from models import Client, Room, Reservation, Model
-from controllers import ClientController, RoomController, ReservationController, ReportController
+from controllers import ClientController, RoomController, ReservationController, ReportController, InformationController
 from validations import ClientRequest, RoomRequest, ReservationRequest, Request
 from interfaces import CliInterface
 
@@ -51,7 +51,9 @@ if __name__ == '__main__':
                     menu.show_reports_options()
                     menu.choose_report_options()
                 case 5:
-                    pass
+                    menu: CliInterface = CliInterface('informações', Model, InformationController(), Request)
+                    menu.show_information_options()
+                    menu.choose_information_options()
                 case 6:
                     loop = False
                 case _:
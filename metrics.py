@@ -0,0 +1,133 @@
+import json
+from contextlib import contextmanager
+from functools import wraps
+from os import environ
+from time import perf_counter
+
+from utils import date_cache_info
+
+_enabled: bool = environ.get('PYHOTEL_METRICS', '').lower() in ['1', 'true', 'yes', 'sim']
+_metrics: dict = {}
+
+
+class Measurement:
+    """
+    Bytes read and written by a measured operation, filled in by the operation itself
+    """
+    __slots__ = ('bytes_read', 'bytes_written')
+
+    def __init__(self) -> None:
+        self.bytes_read: int = 0
+        self.bytes_written: int = 0
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    _metrics.clear()
+
+
+def record(name: str, seconds: float, bytes_read: int = 0, bytes_written: int = 0) -> None:
+    """
+    Adds a call of the operation name to its counters
+
+    :param str name:
+    :param float seconds:
+    :param int bytes_read:
+    :param int bytes_written:
+    """
+    if (metric := _metrics.get(name)) is None:
+        metric = _metrics[name] = {'count': 0, 'seconds': 0.0, 'bytes_read': 0, 'bytes_written': 0}
+    metric['count'] += 1
+    metric['seconds'] += seconds
+    metric['bytes_read'] += bytes_read
+    metric['bytes_written'] += bytes_written
+
+
+@contextmanager
+def measure(name: str):
+    """
+    Times the block as a call of the operation name, yielding a Measurement for the block to
+    report its I/O. Does nothing but yield while the instrumentation is disabled.
+
+    :param str name:
+    """
+    measurement: Measurement = Measurement()
+    if not _enabled:
+        yield measurement
+        return
+    started: float = perf_counter()
+    try:
+        yield measurement
+    finally:
+        record(name, perf_counter() - started, measurement.bytes_read, measurement.bytes_written)
+
+
+def instrument(name: str | None = None):
+    """
+    Decorates a method or classmethod to record its calls under the name of the class it is
+    called on, so Client.save and Room.save get their own counters
+
+    :param str|None name: defaults to the method name
+    """
+    def decorator(method):
+        operation: str = name or method.__name__
+
+        @wraps(method)
+        def wrapper(owner, *args, **kwargs):
+            if not _enabled:
+                return method(owner, *args, **kwargs)
+            started: float = perf_counter()
+            try:
+                return method(owner, *args, **kwargs)
+            finally:
+                record(f'{(owner if isinstance(owner, type) else type(owner)).__name__}.{operation}', perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def snapshot() -> dict:
+    """
+    Returns a copy of the counters of every operation, with the mean time of a call
+
+    :return dict:
+    """
+    return {
+        name: {**metric, 'mean_seconds': metric['seconds'] / metric['count']}
+        for name, metric in sorted(_metrics.items())
+    }
+
+
+def caches() -> dict:
+    """
+    Returns the hit and miss counters of the date caches, which count even while the
+    instrumentation is disabled
+
+    :return dict:
+    """
+    return date_cache_info()
+
+
+def dump(file_path: str) -> dict:
+    """
+    Writes the counters and the date cache counters into a JSON file, returning the counters
+
+    :param str file_path:
+    :return dict:
+    """
+    metrics: dict = snapshot()
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump({'enabled': _enabled, 'metrics': metrics, 'caches': caches()}, file, indent=2)
+    return metrics
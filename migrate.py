@@ -0,0 +1,48 @@
+from contextlib import closing
+from sys import argv, exit
+
+from models import MODELS
+from database import Connection, PickleConnection, SqliteConnection
+from exceptions import DatabaseNotEmptyException
+
+
+def is_empty(connection: Connection, table: str) -> bool:
+    """
+    Verify if the table holds no row at all, deleted ones included
+
+    :param Connection connection:
+    :param str table:
+    :return bool:
+    """
+    with closing(connection.rows(table, include_deleted=True)) as rows:
+        return next(rows, None) is None
+
+
+def migrate(source_path: str, target_path: str) -> dict:
+    """
+    Copies every row of a pickle database into a SQLite database, keeping ids and deleted flags.
+    The whole copy runs in one transaction and is refused when the target already holds rows.
+    Returns how many rows were copied per table.
+
+    :param str source_path:
+    :param str target_path:
+    :return dict:
+    """
+    source: PickleConnection = PickleConnection(source_path, MODELS)
+    target: SqliteConnection = SqliteConnection(target_path, MODELS)
+    with target.transaction():
+        if filled := [model.table_name for model in MODELS if not is_empty(target, model.table_name)]:
+            raise DatabaseNotEmptyException(target_path, filled)
+        return {model.table_name: target.import_rows(model.table_name, source.rows(model.table_name, include_deleted=True)) for model in MODELS}
+
+
+if __name__ == '__main__':
+    source_path: str = argv[1] if len(argv) > 1 else './database.dat'
+    target_path: str = argv[2] if len(argv) > 2 else './database.sqlite3'
+    try:
+        counts: dict = migrate(source_path, target_path)
+    except DatabaseNotEmptyException as e:
+        print(e)
+        exit(1)
+    for table, count in counts.items():
+        print(f'{table}: {count} registros importados')
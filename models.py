@@ -1,32 +1,68 @@
-from os import path
+from os import environ
 from sys import modules
 from typing import Type
 
-from pickle import dump, load
 from tabulate import tabulate
 
-from utils import count_days_from_interval, cast_date, date_is_in_range, today, translate_column_name
-from exceptions import ModelNotFoundedException
-
-class Model:
+from utils import chunks, count_days_from_interval, cast_date, date_to_ordinal, today, translate_column_name, format_value
+from exceptions import ModelNotFoundedException, ValidationException
+from metrics import instrument
+from database import Connection, PickleConnection, SqliteConnection
+
+class ModelMeta(type):
+    """
+    Turns the columns declared by each model into __slots__ and builds a constructor that fills
+    them straight from a stored row
+    """
+    def __new__(mcs, name: str, bases: tuple, namespace: dict):
+        columns: list = [column for column, _ in namespace.get('columns', [])]
+        namespace['__slots__'] = tuple(columns) if bases else ('id', 'deleted', 'version', *columns)
+        cls = super().__new__(mcs, name, bases, namespace)
+        cls._row_constructor = staticmethod(mcs.make_row_constructor(cls))
+        return cls
+
+
+    @staticmethod
+    def make_row_constructor(cls):
+        columns: tuple = tuple(column for column, _ in cls.columns)
+
+        def row_constructor(id, row):
+            model = object.__new__(cls)
+            model.id = id
+            model.deleted = row.get('deleted', False)
+            model.version = row.get('version', 0)
+            for column in columns:
+                setattr(model, column, row.get(column))
+            return model
+        return row_constructor
+
+
+class Model(metaclass=ModelMeta):
     table_name = ''
     columns = []
-    uniques = {}
+    uniques = []
+    rankings = {}
     invisible_columns = ['deleted']
     validations = {}
-    foreign_keys = []
+    foreign_keys = {}
+    intervals = {}
+    calendars = {}
     relationships = {}
 
 
     @classmethod
     def cast_dict_to_model(cls, id: int, row: dict):
-        model = cls()
-        model.__setattr__('id', id)
-        for column, value in row.items():
-            model.__setattr__(column, value)
-        return model
+        return cls._row_constructor(id, row)
     
 
+    @classmethod
+    def cast_row(cls, row: dict) -> dict:
+        for column, type in cls.columns:
+            if type == 'date' and isinstance(row.get(column), str):
+                row[column] = cast_date(row[column])
+        return row
+
+
     def cast_model_to_dict(self) -> dict:
         model_dict: dict = {'deleted': False}
         for column in self.columns:
@@ -35,45 +71,102 @@ class Model:
 
 
     @classmethod
-    def save(cls, model: dict):
-        database = get_connection()
+    @instrument()
+    def save(cls, model: dict, id: int | None = None):
+        model = cls.cast_row(dict(model))
         model['deleted'] = False
-        database[cls.table_name].append(model)
-        save_tables(get_database_path(), database)
-        return cls.cast_dict_to_model(len(database[cls.table_name]) - 1, model)
+        id = get_connection().insert(cls.table_name, model, id)
+        return cls.cast_dict_to_model(id, model)
+
+
+    @classmethod
+    @instrument()
+    def bulk_save(cls, rows, request = None) -> list:
+        with transaction():
+            models: list = []
+            for row in rows:
+                if request is not None and (errors := request.validate(row, 'create')):
+                    raise ValidationException(errors)
+                models.append(cls.save(row))
+            return models
 
 
     @classmethod
+    @instrument()
     def find_all(cls):
-        database = get_connection()
-        models: list = []
-        for id, row in enumerate(database[cls.table_name]):
-            models.append(cls.cast_dict_to_model(id, row))
-        return models
+        return [cls.cast_dict_to_model(id, row) for id, row in get_connection().rows(cls.table_name, include_deleted=True)]
+
+
+    @classmethod
+    def iter_all(cls):
+        return cls.where()
+
+
+    @classmethod
+    def page(cls, offset: int, limit: int) -> list:
+        return [cls.cast_dict_to_model(id, row) for id, row in get_connection().page(cls.table_name, offset, limit)]
 
 
     @classmethod
+    def count(cls) -> int:
+        return get_connection().count(cls.table_name)
+
+
+    @classmethod
+    def where(cls, predicate = None, **criteria):
+        for id, row in get_connection().rows(cls.table_name):
+            if any(row.get(column) != value for column, value in criteria.items()):
+                continue
+            model = cls.cast_dict_to_model(id, row)
+            if predicate is None or predicate(model):
+                yield model
+
+
+    @classmethod
+    @instrument()
+    def find_all_by(cls, column: str, value) -> list:
+        connection: Connection = get_connection()
+        return cls.find_many(connection.lookup(cls.table_name, column, value))
+
+
+    @classmethod
+    @instrument()
+    def find_by(cls, column: str, value):
+        connection: Connection = get_connection()
+        id: int | None = connection.find_unique(cls.table_name, column, value)
+        return cls.cast_dict_to_model(id, connection.find(cls.table_name, id)) if id is not None else None
+
+
+    @classmethod
+    @instrument()
     def find(cls, id: int):
-        database = get_connection()
-        for index, row in enumerate(database[cls.table_name]):
-            if index == id and not row['deleted']:
-                return cls.cast_dict_to_model(id, row)
-        raise ModelNotFoundedException(id)
+        row: dict | None = get_connection().find(cls.table_name, id)
+        if row is None or row['deleted']:
+            raise ModelNotFoundedException(id)
+        return cls.cast_dict_to_model(id, row)
 
 
+    @classmethod
+    @instrument()
+    def find_many(cls, ids) -> list:
+        ids = list(ids)
+        rows: dict = get_connection().find_many(cls.table_name, ids)
+        return [cls.cast_dict_to_model(id, row) for id in ids if (row := rows.get(id)) is not None and not row['deleted']]
+
+
+    @instrument()
     def update(self, data: dict):
-        for column, value in data.items():
-            self.__setattr__(column, value)
-        database: dict = get_connection()
-        database[self.table_name][self.id] = self.cast_model_to_dict()
-        save_tables(get_database_path(), database)
+        data = self.cast_row(data)
+        for column, _ in self.columns:
+            if column in data:
+                setattr(self, column, data[column])
+        self.version = get_connection().update(self.table_name, self.id, self.cast_model_to_dict(), self.version)
         return self
 
     
+    @instrument()
     def delete(self) -> bool:
-        database: dict = get_connection()
-        database[self.table_name][self.id]['deleted'] = True
-        save_tables(get_database_path(), database)
+        get_connection().delete(self.table_name, self.id)
         return True
 
     
@@ -81,7 +174,7 @@ class Model:
         row = [['ID'], [self.id]]
         for column in self.columns:
             row[0].append(translate_column_name(column[0]))
-            row[1].append(getattr(self, column[0]))
+            row[1].append(format_value(getattr(self, column[0])))
         return tabulate(row, headers='firstrow', tablefmt='rounded_grid')
 
 
@@ -99,7 +192,7 @@ class Client(Model):
     
     
     def reservations(self) -> list:
-        return [reservation for reservation in Reservation.find_all() if reservation.client_id == self.id]
+        return Reservation.find_all_by('client_id', self.id)
 
 
 class Room(Model):
@@ -112,20 +205,43 @@ class Room(Model):
     uniques = [
         "number"
     ]
+    rankings = {
+        "price": ("maximum_capacity", "diary_price", "number"),
+    }
     relationships = {
         "has_many": ["Reservation"]
     }
     
     
-    def is_reservated(self) -> bool:
-        for reservation in self.reservations():
-            if date_is_in_range(reservation.check_in_date, reservation.check_out_date):
-                return True
-        return False
+    def is_reservated(self, target_date = None) -> bool:
+        day: int = date_to_ordinal(target_date or today())
+        return get_connection().overlaps(Reservation.table_name, 'stays', self.id, day, day + 1)
+    
+    
+    def is_free(self, check_in_date, check_out_date, ignored_reservation_id: int | None = None) -> bool:
+        start, end = date_to_ordinal(check_in_date), date_to_ordinal(check_out_date)
+        overlapping: list = get_connection().overlapping(Reservation.table_name, 'stays', self.id, start, end)
+        return all(id == ignored_reservation_id for id in overlapping)
+    
+    
+    @classmethod
+    def find_free(cls, check_in_date, check_out_date) -> list:
+        start, end = date_to_ordinal(check_in_date), date_to_ordinal(check_out_date)
+        busy: set = get_connection().busy_groups(Reservation.table_name, 'stays', start, end)
+        return [room for room in cls.iter_all() if room.id not in busy]
+
+
+    @classmethod
+    def search_available(cls, check_in_date, check_out_date, guests: int = 1, chunk_size: int = 64):
+        connection: Connection = get_connection()
+        start, end = date_to_ordinal(check_in_date), date_to_ordinal(check_out_date)
+        for ids in chunks(connection.ranked(cls.table_name, 'price', guests), chunk_size):
+            busy: set = connection.busy_groups(Reservation.table_name, 'stays', start, end, ids)
+            yield from cls.find_many(id for id in ids if id not in busy)
     
     
     def reservations(self) -> list:
-        return [reservation for reservation in Reservation.find_all() if reservation.room_id == self.id]
+        return Reservation.find_all_by('room_id', self.id)
 
 
 class Reservation(Model):
@@ -136,10 +252,28 @@ class Reservation(Model):
         ("check_in_date", "date"),
         ("check_out_date", "date"),
     ]
+    foreign_keys = {
+        "client_id": "clients",
+        "room_id": "rooms",
+    }
+    intervals = {
+        "stays": ("room_id", "check_in_date", "check_out_date"),
+    }
+    calendars = {
+        "nights": ("room_id", "check_in_date", "check_out_date"),
+    }
     
+    @classmethod
+    def reserve(cls, data: dict, id: int | None = None):
+        model: dict = cls.cast_row(dict(data))
+        model['deleted'] = False
+        id = get_connection().insert_unless_overlapping(cls.table_name, 'stays', model, id)
+        return cls.cast_dict_to_model(id, model) if id is not None else None
+
+
     @classmethod
     def get_paids(cls) -> list:
-        return [reservation for reservation in cls.find_all() if cast_date(reservation.check_out_date) < today()]
+        return list(cls.where(lambda reservation: reservation.check_out_date < today()))
     
     
     def get_balance(self) -> float:
@@ -155,22 +289,46 @@ class Reservation(Model):
     
 
 
-def load_tables(file_name) -> dict:
-    with open(file_name, 'rb') as file:
-        tables = load(file)
-    return tables
+MODELS: tuple = (Client, Room, Reservation)
+
+_connection: Connection | None = None
 
 
-def save_tables(file_name, tables) -> None:
-    with open(file_name, 'wb') as file:
-        dump(tables, file)
+def get_storage_engine() -> str:
+    return environ.get('PYHOTEL_STORAGE', 'pickle').lower()
 
 
 def get_database_path() -> str:
-    return './database.dat'
+    if path := environ.get('PYHOTEL_DATABASE'):
+        return path
+    return './database.sqlite3' if get_storage_engine() == 'sqlite' else './database.dat'
+
+
+def migrate_dates(tables: dict) -> bool:
+    migrated: bool = False
+    for model in MODELS:
+        date_columns: list = [column for column, type in model.columns if type == 'date']
+        for row in tables[model.table_name].values():
+            if any(isinstance(row.get(column), str) for column in date_columns):
+                model.cast_row(row)
+                migrated = True
+    return migrated
+
+
+def create_connection(engine: str, database_path: str) -> Connection:
+    match engine:
+        case 'sqlite':
+            return SqliteConnection(database_path, MODELS)
+        case _:
+            return PickleConnection(database_path, MODELS, [migrate_dates])
+
+
+def get_connection() -> Connection:
+    global _connection
+    if _connection is None or _connection.database_path != get_database_path():
+        _connection = create_connection(get_storage_engine(), get_database_path())
+    return _connection
 
 
-def get_connection() -> dict:
-    database_struct: dict = { "clients": [], "rooms": [], "reservations": [] }
-    database_path = get_database_path()
-    return load_tables(database_path) if path.isfile(database_path) else database_struct
\ No newline at end of file
+def transaction():
+    return get_connection().transaction()
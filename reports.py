@@ -0,0 +1,178 @@
+from os import environ
+from datetime import date
+from typing import List
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from models import Room, Reservation, get_connection
+from exceptions import MissingDependencyException
+from utils import count_days_from_interval, date_to_ordinal, today
+
+
+class ReportEngine:
+    """
+    Computes reports reading each table once and joining rows in memory
+    """
+    PERIOD_GROUPS: tuple = ('day', 'month', 'room')
+
+    def get_room_prices(self) -> dict:
+        return {room.id: room.diary_price for room in Room.find_all()}
+
+
+    def get_revenue(self) -> dict:
+        """
+        Returns the balance of every paid reservation and their total
+
+        :return dict:
+        """
+        prices: dict = self.get_room_prices()
+        reservations: List[Reservation] = Reservation.get_paids()
+        balances: dict = {
+            reservation.id: prices[reservation.room_id] * count_days_from_interval(reservation.check_in_date, reservation.check_out_date)
+            for reservation in reservations
+        }
+        return {'total_balance': sum(balances.values()), 'reservations': reservations, 'balances': balances}
+
+
+    def get_period_report(self, start_date, end_date, group_by: str = 'day') -> list:
+        """
+        Returns revenue, sold nights and occupancy rate between start_date and end_date (inclusive),
+        bucketed by day, month or room. Reads only the days of the range from the nights calendar.
+
+        :param start_date:
+        :param end_date:
+        :param str group_by: day, month or room
+        :return list:
+        """
+        if group_by not in self.PERIOD_GROUPS:
+            raise ValueError(f'Agrupamento inválido: {group_by}. Use day, month ou room')
+        start, end = date_to_ordinal(start_date), date_to_ordinal(end_date)
+        rooms: List[Room] = Room.find_all()
+        prices: dict = {room.id: room.diary_price for room in rooms}
+        live_room_ids: list = [room.id for room in rooms if not room.deleted]
+        buckets: dict = {}
+        if group_by == 'room':
+            for room_id in live_room_ids:
+                buckets[room_id] = {'revenue': 0.0, 'nights': 0, 'capacity': end - start + 1}
+        else:
+            for day in range(start, end + 1):
+                buckets.setdefault(self._period_key(day, group_by), {'revenue': 0.0, 'nights': 0, 'capacity': 0})['capacity'] += len(live_room_ids)
+        for day, room_nights in get_connection().calendar(Reservation.table_name, 'nights', start, end):
+            for room_id, nights in room_nights.items():
+                key = room_id if group_by == 'room' else self._period_key(day, group_by)
+                bucket: dict = buckets.setdefault(key, {'revenue': 0.0, 'nights': 0, 'capacity': end - start + 1})
+                bucket['revenue'] += prices[room_id] * nights
+                bucket['nights'] += nights
+        return [
+            {
+                'period': key,
+                'revenue': bucket['revenue'],
+                'nights': bucket['nights'],
+                'occupancy_rate': bucket['nights'] / bucket['capacity'] if bucket['capacity'] else 0.0,
+            }
+            for key, bucket in sorted(buckets.items())
+        ]
+
+
+    @staticmethod
+    def _period_key(day: int, group_by: str) -> date:
+        period: date = date.fromordinal(day)
+        return period.replace(day=1) if group_by == 'month' else period
+
+
+    def get_reserved_room_ids(self, target_date) -> set:
+        """
+        Returns the ids of the live rooms occupied on target_date
+
+        :param target_date:
+        :return set:
+        """
+        connection = get_connection()
+        day: int = date_to_ordinal(target_date)
+        return connection.existing_ids(Room.table_name, connection.busy_groups(Reservation.table_name, 'stays', day, day + 1))
+
+
+class NumpyReportEngine(ReportEngine):
+    """
+    Computes reports with vectorized operations over columnar copies of the tables.
+
+    The arrays are rebuilt only when the connection reports a new mutation.
+    """
+    def __init__(self) -> None:
+        if numpy is None:
+            raise MissingDependencyException('numpy')
+        self._columns: dict | None = None
+        self._columns_key: tuple | None = None
+
+
+    def get_columns(self) -> dict:
+        """
+        Returns the rooms and the live reservations as NumPy arrays
+
+        :return dict:
+        """
+        connection = get_connection()
+        key: tuple = (id(connection), connection.sequence)
+        if self._columns is None or key != self._columns_key:
+            self._columns = self._materialize(connection)
+            self._columns_key = key
+        return self._columns
+
+
+    @staticmethod
+    def _materialize(connection) -> dict:
+        rooms: list = list(connection.rows(Room.table_name, include_deleted=True))
+        reservations: list = list(connection.rows(Reservation.table_name))
+        room_ids = numpy.fromiter((id for id, _ in rooms), dtype=numpy.int64, count=len(rooms))
+        size: int = int(room_ids.max()) + 1 if len(rooms) else 0
+        room_prices = numpy.zeros(size, dtype=numpy.float64)
+        room_prices[room_ids] = numpy.fromiter((row['diary_price'] for _, row in rooms), dtype=numpy.float64, count=len(rooms))
+        room_deleted = numpy.ones(size, dtype=bool)
+        room_deleted[room_ids] = numpy.fromiter((row['deleted'] for _, row in rooms), dtype=bool, count=len(rooms))
+        return {
+            'room_prices': room_prices,
+            'room_deleted': room_deleted,
+            'reservations': reservations,
+            'reservation_ids': numpy.fromiter((id for id, _ in reservations), dtype=numpy.int64, count=len(reservations)),
+            'reservation_rooms': numpy.fromiter((row['room_id'] for _, row in reservations), dtype=numpy.int64, count=len(reservations)),
+            'check_in': numpy.fromiter((date_to_ordinal(row['check_in_date']) for _, row in reservations), dtype=numpy.int64, count=len(reservations)),
+            'check_out': numpy.fromiter((date_to_ordinal(row['check_out_date']) for _, row in reservations), dtype=numpy.int64, count=len(reservations)),
+        }
+
+
+    def get_revenue(self) -> dict:
+        columns: dict = self.get_columns()
+        positions = numpy.flatnonzero(columns['check_out'] < date_to_ordinal(today()))
+        balances = columns['room_prices'][columns['reservation_rooms'][positions]] * (columns['check_out'][positions] - columns['check_in'][positions])
+        reservations: list = [Reservation.cast_dict_to_model(*columns['reservations'][position]) for position in positions.tolist()]
+        return {
+            'total_balance': float(balances.sum()),
+            'reservations': reservations,
+            'balances': dict(zip(columns['reservation_ids'][positions].tolist(), balances.tolist())),
+        }
+
+
+    def get_reserved_room_ids(self, target_date) -> set:
+        columns: dict = self.get_columns()
+        day: int = date_to_ordinal(target_date)
+        check_out = numpy.maximum(columns['check_out'], columns['check_in'] + 1)
+        occupied = (columns['check_in'] <= day) & (day < check_out)
+        room_ids = numpy.unique(columns['reservation_rooms'][occupied])
+        return set(room_ids[~columns['room_deleted'][room_ids]].tolist())
+
+
+def create_report_engine(name: str | None = None) -> ReportEngine:
+    """
+    Returns the report engine named by name or by the PYHOTEL_REPORT_ENGINE variable (python or numpy)
+
+    :param str name:
+    :return ReportEngine:
+    """
+    match (name or environ.get('PYHOTEL_REPORT_ENGINE', 'python')).lower():
+        case 'numpy':
+            return NumpyReportEngine()
+        case _:
+            return ReportEngine()
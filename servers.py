@@ -0,0 +1,296 @@
+import asyncio
+import json
+from argparse import ArgumentParser
+from traceback import print_exc
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+
+from models import Model, transaction
+from controllers import ReportController
+from importers import ENTITIES
+from exceptions import (
+    ModelNotFoundedException,
+    ReserveRoomUnavailableException,
+    StaleModelException,
+    UniqueConstraintException,
+    ValidationException,
+)
+from utils import cast_date, format_value, translate_column_name
+
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str | list):
+        self.status = status
+        self.message = message
+        super().__init__(message)
+
+
+def serialize(value):
+    """
+    Converts models, dates and containers returned by the controllers into JSON values
+
+    :param value:
+    """
+    if isinstance(value, Model):
+        return {'id': value.id, 'version': value.version, **{column: format_value(getattr(value, column)) for column, _ in value.columns}}
+    if isinstance(value, dict):
+        return {key: serialize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [serialize(item) for item in value]
+    return format_value(value)
+
+
+class ApiServer:
+    """
+    Serves the controllers as JSON over HTTP/1.1 with keep-alive. Every connection shares the
+    cached database connection; reads run straight on the event loop, while writes are queued and
+    applied in batches, each batch inside a single transaction.
+    """
+    MAX_BODY_SIZE = 1024 * 1024
+    SCALAR_TYPES: tuple = (str, int, float, bool, type(None))
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8000, batch_size: int = 100, keep_alive_timeout: float = 15.0) -> None:
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.keep_alive_timeout = keep_alive_timeout
+        self.entities: dict = {
+            entity: (controller(model), request())
+            for entity, (model, controller, request) in ENTITIES.items()
+        }
+        self.reports: ReportController = ReportController()
+        self._writes: asyncio.Queue | None = None
+
+
+    async def serve(self) -> None:
+        self._writes = asyncio.Queue()
+        writer_task = asyncio.create_task(self._write_loop())
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer_task.cancel()
+
+
+    async def _write_loop(self) -> None:
+        while True:
+            operations: list = [await self._writes.get()]
+            while len(operations) < self.batch_size and not self._writes.empty():
+                operations.append(self._writes.get_nowait())
+            results: list = []
+            try:
+                with transaction():
+                    for operation, future in operations:
+                        try:
+                            results.append((future, operation(), None))
+                        except Exception as e:
+                            results.append((future, None, e))
+            except Exception as e:
+                results = [(future, None, e) for _, future in operations]
+            for future, result, error in results:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+
+    async def write(self, operation):
+        """
+        Queues a function that writes to the database and waits for the batch holding it to commit
+
+        :param operation:
+        """
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._writes.put((operation, future))
+        return await future
+
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request_line: bytes = await asyncio.wait_for(reader.readline(), self.keep_alive_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                if len(parts := request_line.decode('latin-1').split()) != 3:
+                    await self.send(writer, HTTPStatus.BAD_REQUEST, {'errors': ['Linha de requisição inválida']}, False)
+                    break
+                method, target, version = parts
+                headers: dict = {}
+                while (line := await reader.readline()).strip():
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                content_length: str = headers.get('content-length', '0')
+                if not content_length.isdecimal():
+                    await self.send(writer, HTTPStatus.BAD_REQUEST, {'errors': ['Cabeçalho Content-Length inválido']}, False)
+                    break
+                length: int = int(content_length)
+                if length > self.MAX_BODY_SIZE:
+                    await self.send(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'errors': ['Corpo da requisição muito grande']}, False)
+                    break
+                body: bytes = await reader.readexactly(length) if length else b''
+                connection: str = headers.get('connection', '').lower()
+                keep_alive: bool = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                status, payload = await self.dispatch(method, target, body)
+                await self.send(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+    async def send(self, writer: asyncio.StreamWriter, status: HTTPStatus, payload, keep_alive: bool) -> None:
+        content: bytes = json.dumps(serialize(payload), ensure_ascii=False).encode('utf-8')
+        writer.write(
+            f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+            'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(content)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + content
+        )
+        await writer.drain()
+
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> tuple:
+        """
+        Routes a request, returning the response status and payload
+
+        :param str method:
+        :param str target:
+        :param bytes body:
+        :return tuple:
+        """
+        url = urlsplit(target)
+        segments: list = [segment for segment in url.path.split('/') if segment]
+        query: dict = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            data: dict = json.loads(body) if body else {}
+            if not isinstance(data, dict):
+                raise HttpError(HTTPStatus.BAD_REQUEST, 'O corpo da requisição deve ser um objeto JSON')
+            match segments:
+                case ['reports', report]:
+                    return HTTPStatus.OK, self.report(method, report, query)
+                case [entity] if entity in self.entities:
+                    return await self.collection(method, entity, data, query)
+                case [entity, id] if entity in self.entities and id.isdigit():
+                    return await self.member(method, entity, int(id), data)
+            raise HttpError(HTTPStatus.NOT_FOUND, 'Rota não encontrada')
+        except HttpError as e:
+            return e.status, {'errors': e.message if isinstance(e.message, list) else [e.message]}
+        except json.JSONDecodeError:
+            return HTTPStatus.BAD_REQUEST, {'errors': ['JSON inválido']}
+        except ModelNotFoundedException as e:
+            return HTTPStatus.NOT_FOUND, {'errors': [str(e)]}
+        except ValidationException as e:
+            return HTTPStatus.UNPROCESSABLE_ENTITY, {'errors': e.errors}
+        except (UniqueConstraintException, ReserveRoomUnavailableException, StaleModelException) as e:
+            return HTTPStatus.CONFLICT, {'errors': [str(e)]}
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {'errors': [str(e)]}
+        except Exception:
+            print_exc()
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'errors': ['Erro interno do servidor']}
+
+
+    def check_fields(self, entity: str, data: dict, extra_fields: tuple = ()) -> None:
+        """
+        Raises a ValidationException if the body holds a field the model does not declare, or a
+        value that is not a JSON scalar
+
+        :param str entity:
+        :param dict data:
+        :param tuple extra_fields: accepted besides the model columns
+        """
+        model: type[Model] = ENTITIES[entity][0]
+        fields: list = [*(column for column, _ in model.columns), *extra_fields]
+        errors: list = [f'O campo {field} não é aceito' for field in data if field not in fields]
+        errors.extend(
+            f'O campo {translate_column_name(field) or field} possui um valor inválido'
+            for field, value in data.items() if field in fields and not isinstance(value, self.SCALAR_TYPES)
+        )
+        if errors:
+            raise ValidationException(errors)
+
+
+    async def collection(self, method: str, entity: str, data: dict, query: dict) -> tuple:
+        controller, request = self.entities[entity]
+        match method:
+            case 'GET':
+                if 'limit' in query or 'offset' in query:
+                    offset, limit = int(query.get('offset', 0)), int(query.get('limit', 100))
+                    if offset < 0 or limit < 0:
+                        raise HttpError(HTTPStatus.BAD_REQUEST, 'A paginação deve ser positiva')
+                    return HTTPStatus.OK, {'total': controller.count(), 'offset': offset, 'items': controller.page(offset, limit)}
+                return HTTPStatus.OK, list(controller.iter_all())
+            case 'POST':
+                self.check_fields(entity, data)
+                def create():
+                    if errors := request.validate(data, 'create'):
+                        raise ValidationException(errors)
+                    return controller.create(data)
+                return HTTPStatus.CREATED, await self.write(create)
+        raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, 'Método não permitido')
+
+
+    async def member(self, method: str, entity: str, id: int, data: dict) -> tuple:
+        controller, request = self.entities[entity]
+        match method:
+            case 'GET':
+                return HTTPStatus.OK, controller.find(id)
+            case 'PUT' | 'PATCH':
+                self.check_fields(entity, data, ('version',))
+                def update():
+                    model: Model = controller.find(id)
+                    if 'version' in data:
+                        model.version = data.pop('version')
+                    if errors := request.validate(data, 'update', id):
+                        raise ValidationException(errors)
+                    return controller.update(data, model)
+                return HTTPStatus.OK, await self.write(update)
+            case 'DELETE':
+                def delete():
+                    return controller.delete(controller.find(id))
+                await self.write(delete)
+                return HTTPStatus.OK, {'id': id}
+        raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, 'Método não permitido')
+
+
+    def report(self, method: str, report: str, query: dict):
+        if method != 'GET':
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, 'Método não permitido')
+        match report:
+            case 'revenue':
+                return self.reports.get_total_balance()
+            case 'reserved-rooms':
+                return self.reports.get_rooms_currently_reserved()
+            case 'free-rooms':
+                return self.reports.get_rooms_currently_free()
+            case 'available-rooms':
+                if 'check_in' not in query or 'check_out' not in query:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, 'Informe as datas check_in e check_out (dd/mm/aaaa)')
+                limit: int | None = int(query['limit']) if 'limit' in query else None
+                return self.reports.get_available_rooms(query['check_in'], query['check_out'], int(query.get('guests', 1)), int(query.get('offset', 0)), limit)
+            case 'period':
+                if 'start' not in query or 'end' not in query:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, 'Informe as datas start e end (dd/mm/aaaa)')
+                return self.reports.get_period_report(cast_date(query['start']), cast_date(query['end']), query.get('group_by', 'day'))
+        raise HttpError(HTTPStatus.NOT_FOUND, 'Relatório não encontrado')
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Servidor HTTP/JSON do PyHotel')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--batch-size', type=int, default=100, help='escritas agrupadas por transação')
+    arguments = parser.parse_args()
+    print(f'Servindo em http://{arguments.host}:{arguments.port}')
+    try:
+        asyncio.run(ApiServer(arguments.host, arguments.port, arguments.batch_size).serve())
+    except KeyboardInterrupt:
+        pass
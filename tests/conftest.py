@@ -0,0 +1,28 @@
+import sys
+from os import path
+
+import pytest
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from models import get_connection
+
+
+@pytest.fixture(params=['pickle', 'sqlite'])
+def connection(request, tmp_path, monkeypatch):
+    """
+    Points the models to an empty database in tmp_path, once per storage engine
+    """
+    monkeypatch.setenv('PYHOTEL_STORAGE', request.param)
+    monkeypatch.setenv('PYHOTEL_DATABASE', str(tmp_path / 'database'))
+    connection = get_connection()
+    yield connection
+    if hasattr(connection, 'connection'):
+        connection.connection.close()
+
+
+@pytest.fixture
+def pickle_connection(tmp_path, monkeypatch):
+    monkeypatch.setenv('PYHOTEL_STORAGE', 'pickle')
+    monkeypatch.setenv('PYHOTEL_DATABASE', str(tmp_path / 'database.dat'))
+    return get_connection()
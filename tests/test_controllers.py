@@ -0,0 +1,11 @@
+from controllers import InformationController
+from models import Client
+
+
+def test_database_info_counts_live_rows(connection):
+    for number in range(3):
+        Client.save({'name': f'Cliente {number}', 'email': f'cliente{number}@pyhotel.com', 'phone': f'{number:09d}'})
+    Client.find(1).delete()
+    info: dict = InformationController().get_database_info()
+    assert info['path'] == connection.database_path
+    assert info['counts'] == {'clients': 2, 'rooms': 0, 'reservations': 0}
@@ -0,0 +1,140 @@
+from datetime import date
+from os import path
+from pickle import dumps
+
+import pytest
+
+from database import load_tables, save_tables
+from exceptions import ModelNotFoundedException, StaleModelException, UniqueConstraintException
+from models import Client, Room, create_connection, transaction
+
+
+def save_client(number: int) -> Client:
+    return Client.save({'name': f'Cliente {number}', 'email': f'cliente{number}@pyhotel.com', 'phone': f'{number:09d}'})
+
+
+def test_replay_stops_at_a_torn_tail(pickle_connection):
+    save_client(0)
+    save_client(1)
+    with open(pickle_connection.journal_path, 'ab') as journal:
+        journal.write(dumps((99, 'insert', 'clients', 2, {'name': 'Cliente 2'}))[:-5])
+
+    reloaded = create_connection('pickle', pickle_connection.database_path)
+    assert [id for id, _ in reloaded.rows('clients')] == [0, 1]
+
+    reloaded.insert('clients', {'name': 'Cliente 2', 'email': 'cliente2@pyhotel.com', 'phone': '000000002', 'deleted': False})
+    again = create_connection('pickle', pickle_connection.database_path)
+    assert [row['email'] for _, row in again.rows('clients')] == ['cliente0@pyhotel.com', 'cliente1@pyhotel.com', 'cliente2@pyhotel.com']
+
+
+def test_compaction_keeps_rows_versions_and_ids(pickle_connection):
+    for number in range(3):
+        save_client(number)
+    Client.find(1).update({'name': 'Renomeado'})
+    Client.find(2).delete()
+    pickle_connection.compact()
+
+    reloaded = create_connection('pickle', pickle_connection.database_path)
+    rows: dict = dict(reloaded.rows('clients', include_deleted=True))
+    assert rows[1]['name'] == 'Renomeado' and rows[1]['version'] == 2
+    assert rows[2]['deleted'] and rows[2]['version'] == 2
+    assert reloaded.find_unique('clients', 'email', 'cliente1@pyhotel.com') == 1
+    assert reloaded.insert('clients', {'name': 'Novo', 'email': 'novo@pyhotel.com', 'phone': '000000009', 'deleted': False}) == 3
+
+
+def test_transaction_rolls_back_rows_and_indexes(connection):
+    save_client(0)
+    with pytest.raises(RuntimeError):
+        with transaction():
+            save_client(1)
+            Client.find(0).update({'name': 'Renomeado'})
+            raise RuntimeError()
+
+    assert Client.count() == 1
+    assert Client.find(0).name == 'Cliente 0'
+    assert Client.find_by('email', 'cliente1@pyhotel.com') is None
+    assert save_client(1).id == 1
+
+
+def test_transaction_journals_each_write_as_it_was(pickle_connection):
+    with transaction():
+        client: Client = save_client(0)
+        client.update({'name': 'Renomeado'})
+        Client.find(0).delete()
+        save_client(1).delete()
+
+    reloaded = create_connection('pickle', pickle_connection.database_path)
+    for id in (0, 1):
+        assert reloaded.find('clients', id) == pickle_connection.find('clients', id)
+    assert reloaded.find('clients', 0)['version'] == 3
+    assert reloaded.find('clients', 1)['version'] == 2
+
+
+def test_saved_rows_are_not_shared_with_the_caller(connection):
+    data: dict = {'name': 'Ana', 'email': 'ana@pyhotel.com', 'phone': '999999999'}
+    Client.save(data)
+    data['email'] = 'outro@pyhotel.com'
+
+    assert data.keys() == {'name', 'email', 'phone'}
+    assert Client.find(0).email == 'ana@pyhotel.com'
+    assert Client.find_by('email', 'ana@pyhotel.com').id == 0
+    assert Client.find_by('email', 'outro@pyhotel.com') is None
+
+
+def test_update_after_vacuum_is_rejected(connection):
+    client: Client = save_client(0)
+    client.update({'name': 'Renomeado'})
+    stale: Client = Client.find(0)
+    Client.find(0).delete()
+    assert connection.vacuum()['clients'] == 1
+
+    with pytest.raises(ModelNotFoundedException):
+        stale.update({'name': 'Depois do vacuum'})
+
+    reused: Client = save_client(1)
+    assert reused.id == 0 and reused.version > stale.version
+    with pytest.raises(StaleModelException):
+        stale.update({'name': 'Depois do vacuum'})
+    assert Client.find(0).name == 'Cliente 1'
+
+
+def test_legacy_dates_are_migrated_once(tmp_path):
+    database_path: str = str(tmp_path / 'database.dat')
+    save_tables(database_path, {
+        'clients': [{'name': 'Ana', 'email': 'ana@pyhotel.com', 'phone': '999999999', 'deleted': False}],
+        'rooms': [{'number': 1, 'maximum_capacity': 2, 'diary_price': 100.0, 'deleted': False}],
+        'reservations': [{'client_id': 0, 'room_id': 0, 'check_in_date': '30/12/2029', 'check_out_date': '02/01/2030', 'deleted': False}],
+    })
+
+    connection = create_connection('pickle', database_path)
+    assert connection.find('reservations', 0)['check_out_date'] == date(2030, 1, 2)
+    assert list(connection.calendar('reservations', 'nights', 0, 10 ** 6))[-1] == (date(2030, 1, 1).toordinal(), {0: 1})
+    assert load_tables(database_path)['reservations'][0]['check_in_date'] == date(2029, 12, 30)
+    assert not path.exists(f'{database_path}.log')
+
+
+def test_uniques_are_enforced_on_live_rows(connection):
+    first: Client = save_client(0)
+    with pytest.raises(UniqueConstraintException):
+        Client.save({'name': 'Outra', 'email': first.email, 'phone': '123456789'})
+    with pytest.raises(UniqueConstraintException):
+        save_client(1).update({'email': first.email})
+    assert first.update({'email': first.email, 'name': 'Renomeado'}).name == 'Renomeado'
+    assert Client.find_by('email', 'cliente1@pyhotel.com').id == 1
+
+    first.delete()
+    assert Client.find_by('email', 'cliente0@pyhotel.com') is None
+    assert save_client(0).id == 2
+    Room.save({'number': 1, 'maximum_capacity': 2, 'diary_price': 100.0})
+    with pytest.raises(UniqueConstraintException):
+        Room.save({'number': 1, 'maximum_capacity': 4, 'diary_price': 200.0})
+    assert connection.count('rooms') == 1
+
+
+def test_pages_skip_deleted_rows(connection):
+    for number in range(10):
+        save_client(number)
+    Client.find(3).delete()
+    Client.find(4).delete()
+    assert Client.count() == 8
+    assert [[client.id for client in Client.page(offset, 3)] for offset in range(0, 12, 3)] == [[0, 1, 2], [5, 6, 7], [8, 9], []]
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from models import Client, Room, Reservation, get_connection
+from importers import ENTITIES, Importer, export_file
+from servers import serialize
+
+
+def fill() -> None:
+    for number in range(3):
+        Client.save({'name': f'Cliente {number}', 'email': f'cliente{number}@pyhotel.com', 'phone': f'{number:09d}'})
+        Room.save({'number': number + 1, 'maximum_capacity': number + 1, 'diary_price': 80.0 + number})
+    Client.find(1).delete()
+    Reservation.save({'client_id': 2, 'room_id': 1, 'check_in_date': '01/01/2030', 'check_out_date': '03/01/2030'})
+
+
+def dump() -> dict:
+    return {entity: serialize(list(model.iter_all())) for entity, (model, _, _) in ENTITIES.items()}
+
+
+@pytest.mark.parametrize('extension', ['csv', 'jsonl'])
+def test_export_and_import_keep_rows_and_ids(connection, tmp_path, monkeypatch, extension):
+    fill()
+    exported: dict = dump()
+    for entity in ENTITIES:
+        export_file(entity, str(tmp_path / f'{entity}.{extension}'))
+
+    monkeypatch.setenv('PYHOTEL_DATABASE', str(tmp_path / 'copy'))
+    for entity in ENTITIES:
+        assert Importer(entity).import_file(str(tmp_path / f'{entity}.{extension}'))['rejected'] == 0
+    assert dump() == exported
+    if hasattr(get_connection(), 'connection'):
+        get_connection().connection.close()
+
+
+def test_json_numbers_are_cast_to_the_column_type(connection, tmp_path):
+    rows: list = [
+        {'number': 1, 'maximum_capacity': 2, 'diary_price': 120},
+        {'number': 2, 'maximum_capacity': 3.0, 'diary_price': 99.5},
+        {'number': 3, 'maximum_capacity': 2.5, 'diary_price': 100},
+    ]
+    file_path = tmp_path / 'rooms.jsonl'
+    file_path.write_text(''.join(json.dumps(row) + '\n' for row in rows), encoding='utf-8')
+
+    assert Importer('rooms').import_file(str(file_path)) == {'imported': 2, 'rejected': 1}
+    assert [(room.maximum_capacity, room.diary_price) for room in Room.find_all()] == [(2, 120.0), (3, 99.5)]
+    assert all(isinstance(room.diary_price, float) and isinstance(room.maximum_capacity, int) for room in Room.find_all())
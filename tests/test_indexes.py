@@ -0,0 +1,53 @@
+from indexes import IntervalIndex, IntervalList
+
+
+def interval_list(*intervals: tuple) -> IntervalList:
+    result = IntervalList()
+    for interval in intervals:
+        result.insert(interval)
+    return result
+
+
+def test_empty_list_overlaps_nothing():
+    intervals = IntervalList()
+    assert not intervals.overlaps(0, 10)
+    assert intervals.overlapping(0, 10) == []
+
+
+def test_intervals_are_half_open():
+    intervals = interval_list((1, 3, 0))
+    assert not intervals.overlaps(3, 5)
+    assert not intervals.overlaps(0, 1)
+    assert intervals.overlaps(2, 3)
+    assert intervals.overlaps(0, 10)
+
+
+def test_long_interval_is_found_past_shorter_ones():
+    intervals = interval_list((1, 10, 0), (2, 3, 1), (4, 5, 2))
+    assert intervals.overlaps(6, 7)
+    assert intervals.overlapping(6, 7) == [0]
+    assert intervals.overlapping(2, 5) == [0, 1, 2]
+
+
+def test_remove_refreshes_the_running_maximum():
+    intervals = interval_list((1, 10, 0), (2, 3, 1), (4, 5, 2))
+    intervals.remove((1, 10, 0))
+    assert not intervals.overlaps(6, 7)
+    assert intervals.overlapping(0, 10) == [1, 2]
+    intervals.remove((1, 10, 0))
+    assert intervals.overlapping(0, 10) == [1, 2]
+
+
+def test_intervals_sharing_a_start():
+    intervals = interval_list((2, 6, 2), (2, 4, 1))
+    assert intervals.overlapping(5, 6) == [2]
+    assert intervals.overlapping(3, 4) == [1, 2]
+
+
+def test_same_day_stay_takes_one_day():
+    index = IntervalIndex('stays', 'room_id', 'check_in_date', 'check_out_date')
+    index.add(0, {'room_id': 1, 'check_in_date': 5, 'check_out_date': 5})
+    assert index.overlaps(1, 5, 5)
+    assert index.overlapping(1, 4, 6) == [0]
+    assert not index.overlaps(1, 6, 7)
+    assert index.busy_groups(5, 6) == {1}
@@ -0,0 +1,27 @@
+import pytest
+
+from models import Client, Room, Reservation, create_connection
+from migrate import migrate
+from exceptions import DatabaseNotEmptyException
+
+
+def test_migrate_copies_rows_ids_and_deleted_flags(pickle_connection, tmp_path):
+    for number in range(3):
+        Client.save({'name': f'Cliente {number}', 'email': f'cliente{number}@pyhotel.com', 'phone': f'{number:09d}'})
+    Room.save({'number': 1, 'maximum_capacity': 2, 'diary_price': 100.0})
+    Reservation.save({'client_id': 2, 'room_id': 0, 'check_in_date': '01/01/2030', 'check_out_date': '04/01/2030'})
+    Client.find(1).delete()
+    target_path: str = str(tmp_path / 'database.sqlite3')
+
+    assert migrate(pickle_connection.database_path, target_path) == {'clients': 3, 'rooms': 1, 'reservations': 1}
+    target = create_connection('sqlite', target_path)
+    for table in ('clients', 'rooms', 'reservations'):
+        assert list(target.rows(table, include_deleted=True)) == list(pickle_connection.rows(table, include_deleted=True))
+    assert list(target.calendar('reservations', 'nights', 0, 10 ** 6)) == list(pickle_connection.calendar('reservations', 'nights', 0, 10 ** 6))
+    target.connection.close()
+
+    with pytest.raises(DatabaseNotEmptyException):
+        migrate(pickle_connection.database_path, target_path)
+    target = create_connection('sqlite', target_path)
+    assert target.count('clients') == 2
+    target.connection.close()
@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+
+import pytest
+
+from models import Client, Room, Reservation, create_connection
+from reports import ReportEngine, NumpyReportEngine
+from utils import format_date, today
+
+
+@pytest.fixture
+def reservations(connection) -> list:
+    Client.save({'name': 'Ana', 'email': 'ana@pyhotel.com', 'phone': '999999999'})
+    Room.save({'number': 1, 'maximum_capacity': 2, 'diary_price': 100.0})
+    Room.save({'number': 2, 'maximum_capacity': 2, 'diary_price': 50.0})
+    return [
+        Reservation.save({'client_id': 0, 'room_id': 0, 'check_in_date': '01/01/2030', 'check_out_date': '03/01/2030'}),
+        Reservation.save({'client_id': 0, 'room_id': 1, 'check_in_date': '02/01/2030', 'check_out_date': '05/01/2030'}),
+    ]
+
+
+def summary(report: list) -> list:
+    return [(row['period'], row['revenue'], row['nights'], row['occupancy_rate']) for row in report]
+
+
+def test_period_report_by_day(reservations):
+    assert summary(ReportEngine().get_period_report('01/01/2030', '03/01/2030')) == [
+        (date(2030, 1, 1), 100.0, 1, 0.5),
+        (date(2030, 1, 2), 150.0, 2, 1.0),
+        (date(2030, 1, 3), 50.0, 1, 0.5),
+    ]
+
+
+def test_period_report_by_room_and_month(reservations):
+    assert summary(ReportEngine().get_period_report('01/01/2030', '03/01/2030', 'room')) == [(0, 200.0, 2, 2 / 3), (1, 100.0, 2, 2 / 3)]
+    assert summary(ReportEngine().get_period_report('01/01/2030', '31/01/2030', 'month')) == [(date(2030, 1, 1), 350.0, 5, 5 / 62)]
+
+
+def test_period_report_follows_updates_and_deletes(reservations):
+    first, second = reservations
+    first.update({'check_out_date': '04/01/2030'})
+    second.delete()
+    assert summary(ReportEngine().get_period_report('01/01/2030', '04/01/2030', 'room')) == [(0, 300.0, 3, 3 / 4), (1, 0.0, 0, 0.0)]
+
+
+def test_sqlite_calendar_is_rebuilt_from_the_rows(reservations, connection):
+    if not hasattr(connection, 'connection'):
+        pytest.skip('only the SQLite engine keeps the calendar in a table')
+    expected: list = list(connection.calendar('reservations', 'nights', 0, 10 ** 6))
+    connection.connection.execute('DROP TABLE reservations_nights')
+    reopened = create_connection('sqlite', connection.database_path)
+    assert list(reopened.calendar('reservations', 'nights', 0, 10 ** 6)) == expected
+    reopened.connection.close()
+
+
+def test_numpy_engine_matches_the_python_engine(reservations):
+    pytest.importorskip('numpy')
+    day: date = today()
+    for room_id, start, end in [(0, -10, -7), (1, -3, 2), (0, -1, 1), (1, 5, 9)]:
+        Reservation.save({'client_id': 0, 'room_id': room_id, 'check_in_date': format_date(day + timedelta(days=start)), 'check_out_date': format_date(day + timedelta(days=end))})
+    Room.save({'number': 3, 'maximum_capacity': 4, 'diary_price': 300.0})
+    Reservation.save({'client_id': 0, 'room_id': 2, 'check_in_date': format_date(day - timedelta(days=1)), 'check_out_date': format_date(day + timedelta(days=3))})
+    Room.find(2).delete()
+
+    python, numpy = ReportEngine(), NumpyReportEngine()
+    def compare() -> None:
+        expected, result = python.get_revenue(), numpy.get_revenue()
+        assert result['total_balance'] == expected['total_balance'] and result['balances'] == expected['balances']
+        assert [reservation.id for reservation in result['reservations']] == [reservation.id for reservation in expected['reservations']]
+        assert numpy.get_reserved_room_ids(day) == python.get_reserved_room_ids(day) == {0, 1}
+        start, end = day - timedelta(days=30), day + timedelta(days=30)
+        assert numpy.get_period_report(start, end, 'month') == python.get_period_report(start, end, 'month')
+
+    compare()
+    assert numpy.get_revenue()['total_balance'] == 300.0
+    Reservation.find(2).delete()
+    compare()
+    assert numpy.get_revenue()['total_balance'] == 0.0
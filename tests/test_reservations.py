@@ -0,0 +1,41 @@
+import pytest
+
+from models import Client, Room, Reservation
+from controllers import ReservationController
+from exceptions import ReserveRoomUnavailableException
+
+
+@pytest.fixture
+def controller(connection) -> ReservationController:
+    Client.save({'name': 'Ana', 'email': 'ana@pyhotel.com', 'phone': '999999999'})
+    for number in (1, 2):
+        Room.save({'number': number, 'maximum_capacity': 2, 'diary_price': 100.0})
+    return ReservationController(Reservation)
+
+
+def reserve(controller: ReservationController, room_id: int, check_in_date: str, check_out_date: str) -> Reservation:
+    return controller.create({'client_id': 0, 'room_id': room_id, 'check_in_date': check_in_date, 'check_out_date': check_out_date})
+
+
+def test_overlapping_stays_are_refused(controller):
+    reserve(controller, 0, '01/01/2030', '05/01/2030')
+    reserve(controller, 0, '05/01/2030', '07/01/2030')
+    with pytest.raises(ReserveRoomUnavailableException, match='entre 04/01/2030 e 06/01/2030'):
+        reserve(controller, 0, '04/01/2030', '06/01/2030')
+
+
+def test_update_checks_the_new_stay(controller):
+    reserve(controller, 0, '01/01/2030', '05/01/2030')
+    other: Reservation = reserve(controller, 1, '03/01/2030', '08/01/2030')
+    with pytest.raises(ReserveRoomUnavailableException, match='entre 03/01/2030 e 08/01/2030'):
+        controller.update({'room_id': 0}, other)
+    assert controller.update({'check_in_date': '06/01/2030'}, other).check_in_date.day == 6
+
+
+@pytest.mark.parametrize('check_in_date, check_out_date', [('05/01/2030', '01/01/2030'), ('01/01/2030', '01/01/2030')])
+def test_stays_must_end_after_they_start(controller, check_in_date, check_out_date):
+    with pytest.raises(ValueError):
+        reserve(controller, 0, check_in_date, check_out_date)
+    reservation: Reservation = reserve(controller, 0, '01/01/2030', '03/01/2030')
+    with pytest.raises(ValueError):
+        controller.update({'check_in_date': check_in_date, 'check_out_date': check_out_date}, reservation)
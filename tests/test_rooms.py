@@ -0,0 +1,53 @@
+import pytest
+
+from models import Client, Room, Reservation, get_connection, transaction
+from controllers import ReportController
+from reports import ReportEngine
+from utils import date_to_ordinal
+
+
+def fill() -> None:
+    with transaction():
+        Client.save({'name': 'Ana', 'email': 'ana@pyhotel.com', 'phone': '999999999'})
+        for number in range(150):
+            Room.save({'number': number, 'maximum_capacity': number % 4 + 1, 'diary_price': float(number * 37 % 11 * 10)})
+        for room_id in range(0, 150, 7):
+            Reservation.save({'client_id': 0, 'room_id': room_id, 'check_in_date': '01/01/2030', 'check_out_date': '05/01/2030'})
+        Room.find(3).delete()
+
+
+def search(guests: int, offset: int = 0, limit: int | None = None) -> list:
+    rooms = ReportController(ReportEngine()).get_available_rooms('03/01/2030', '04/01/2030', guests, offset, limit)
+    return [room.number for room in rooms]
+
+
+def test_both_engines_rank_and_page_the_same_rooms(tmp_path, monkeypatch):
+    results: dict = {}
+    for engine in ('pickle', 'sqlite'):
+        monkeypatch.setenv('PYHOTEL_STORAGE', engine)
+        monkeypatch.setenv('PYHOTEL_DATABASE', str(tmp_path / engine))
+        fill()
+        results[engine] = [search(guests) for guests in (1, 2, 3)] + [search(2, offset, 20) for offset in range(0, 120, 20)]
+        if engine == 'sqlite':
+            get_connection().connection.close()
+    assert results['pickle'] == results['sqlite']
+
+    every, couples, large, *pages = results['sqlite']
+    assert [number for page in pages for number in page] == couples
+    assert 3 not in every and not any(number % 7 == 0 for number in every)
+    assert all(number % 4 + 1 >= 3 for number in large)
+    assert every == sorted(every, key=lambda number: (number * 37 % 11, number))
+
+
+def test_busy_groups_checks_only_the_given_groups(connection):
+    fill()
+    start, end = date_to_ordinal('03/01/2030'), date_to_ordinal('04/01/2030')
+    assert connection.busy_groups('reservations', 'stays', start, end, [6, 7, 14]) == {7, 14}
+    assert connection.busy_groups('reservations', 'stays', start, end, []) == set()
+    assert connection.busy_groups('reservations', 'stays', end + 1, end + 2, [7]) == set()
+
+
+@pytest.mark.parametrize('offset, limit', [(-1, None), (0, -1)])
+def test_negative_pages_are_refused(connection, offset, limit):
+    with pytest.raises(ValueError):
+        search(1, offset, limit)
@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+from servers import ApiServer, serialize
+
+
+ANA: dict = {'name': 'Ana', 'email': 'ana@pyhotel.com', 'phone': '999999999'}
+
+
+@pytest.fixture
+def server(connection) -> ApiServer:
+    return ApiServer(port=0)
+
+
+def call(server: ApiServer, method: str, target: str, body: dict | None = None) -> tuple:
+    async def run() -> tuple:
+        server._writes = asyncio.Queue()
+        writer_task = asyncio.create_task(server._write_loop())
+        try:
+            status, payload = await server.dispatch(method, target, json.dumps(body).encode('utf-8') if body is not None else b'')
+        finally:
+            writer_task.cancel()
+        return status.value, serialize(payload)
+    return asyncio.run(run())
+
+
+def exchange(server: ApiServer, request: bytes) -> bytes:
+    async def run() -> bytes:
+        listener = await asyncio.start_server(server.handle_connection, '127.0.0.1', 0)
+        async with listener:
+            reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+            writer.write(request)
+            await writer.drain()
+            response: bytes = await reader.read()
+            writer.close()
+            return response
+    return asyncio.run(run())
+
+
+def test_create_find_and_update(server):
+    status, client = call(server, 'POST', '/clients', ANA)
+    assert status == 201 and client['id'] == 0 and client['version'] == 1
+    assert call(server, 'GET', '/clients/0') == (200, client)
+    assert call(server, 'PATCH', '/clients/0', {'name': 'Ana Maria', 'version': 1})[1]['name'] == 'Ana Maria'
+    assert call(server, 'PATCH', '/clients/0', {'name': 'Ana', 'version': 1})[0] == 409
+    assert call(server, 'POST', '/clients', {**ANA, 'phone': '123'})[0] == 422
+    assert call(server, 'POST', '/clients', {**ANA, 'age': 30})[0] == 422
+    assert call(server, 'GET', '/clients/7')[0] == 404
+
+
+def test_collection_pages(server):
+    for number in range(3):
+        call(server, 'POST', '/rooms', {'number': number + 1, 'maximum_capacity': 2, 'diary_price': 100.0})
+    status, page = call(server, 'GET', '/rooms?offset=1&limit=1')
+    assert status == 200 and page['total'] == 3 and [room['number'] for room in page['items']] == [2]
+
+
+@pytest.mark.parametrize('query', ['offset=-1', 'limit=-1', 'offset=a'])
+def test_negative_or_invalid_pages_are_refused(server, query):
+    assert call(server, 'GET', f'/rooms?{query}')[0] == 400
+
+
+@pytest.mark.parametrize('request_line', [b'GET\r\n', b'GET / HTTP/1.1 extra\r\n'])
+def test_malformed_request_line_is_answered(server, request_line):
+    assert exchange(server, request_line + b'\r\n').startswith(b'HTTP/1.1 400 Bad Request')
+
+
+@pytest.mark.parametrize('length', [b'-5', b'abc'])
+def test_invalid_content_length_is_answered(server, length):
+    response: bytes = exchange(server, b'POST /clients HTTP/1.1\r\nContent-Length: ' + length + b'\r\n\r\n')
+    assert response.startswith(b'HTTP/1.1 400 Bad Request') and 'Content-Length'.encode() in response
@@ -0,0 +1,39 @@
+import pytest
+
+from models import Client, Room
+from validations import RoomRequest, ClientRequest, ReservationRequest
+
+
+def test_plans_are_compiled_once_per_request_class():
+    assert RoomRequest().get_plan('update') is RoomRequest().get_plan('update')
+    assert RoomRequest().get_plan('update') is not RoomRequest().get_plan('create')
+
+
+@pytest.mark.parametrize('data', [{'maximum_capacity': 0}, {'diary_price': 0.0}, {'number': -1}])
+def test_update_checks_falsy_values(connection, data):
+    assert RoomRequest().validate(data, 'update', 0)
+
+
+def test_update_skips_missing_values(connection):
+    assert RoomRequest().validate({'number': None, 'maximum_capacity': 2}, 'update', 0) == []
+    assert ClientRequest().validate({'phone': ''}, 'update', 0) == ['O campo Telefone não é um número de telefone válido']
+
+
+def test_validate_many_fetches_each_table_once(connection, monkeypatch):
+    for number in range(2):
+        Client.save({'name': f'Cliente {number}', 'email': f'cliente{number}@pyhotel.com', 'phone': f'{number:09d}'})
+    Room.save({'number': 1, 'maximum_capacity': 2, 'diary_price': 100.0})
+    Client.find(1).delete()
+    fetched: list = []
+    existing_ids = connection.existing_ids
+    monkeypatch.setattr(connection, 'existing_ids', lambda table, ids: fetched.append(table) or existing_ids(table, ids))
+    monkeypatch.setattr(connection, 'exists', lambda table, id: pytest.fail('exists_in should read the snapshot'))
+
+    rows: list = [
+        {'client_id': client_id, 'room_id': room_id, 'check_in_date': '01/01/2030', 'check_out_date': '02/01/2030'}
+        for client_id, room_id in [(0, 0), (1, 0), (0, 5), (None, 0)]
+    ]
+    errors: list = ReservationRequest().validate_many(rows, 'create')
+    assert sorted(fetched) == ['clients', 'rooms']
+    assert [len(row_errors) for row_errors in errors] == [0, 1, 1, 2]
+    assert 'Cliente' in errors[1][0] and 'Quarto' in errors[2][0]
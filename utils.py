@@ -1,5 +1,9 @@
-from typing import List
 from datetime import date
+from functools import lru_cache
+from itertools import islice
+
+DATE_CACHE_SIZE = 4096
+
 
 def translate_column_name(column_name: str) -> str:
   match column_name:
@@ -27,6 +31,8 @@ def translate_column_name(column_name: str) -> str:
       return 'Identificação do Quarto'
     case 'client_id':
       return 'Identificação do Cliente'
+    case 'id':
+      return 'ID'
     case _:
       return ''
 
@@ -35,12 +41,26 @@ def today():
   return date.today()
     
 
-def cast_date(date_to_cast: str):
-  parts: List[str] = []
-  for part in date_to_cast.split('/'):
-    valid_part: int = int(part if not part.startswith('0') else part.replace('0', ''))
-    parts.append(valid_part)
-  return date(parts[2], parts[1], parts[0])
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def cast_date(date_to_cast: str | date) -> date:
+  if isinstance(date_to_cast, date):
+    return date_to_cast
+  day, month, year = (int(part) for part in date_to_cast.split('/'))
+  return date(year, month, day)
+
+
+def format_date(date_to_format: date) -> str:
+  return date_to_format.strftime('%d/%m/%Y')
+
+
+def format_value(value):
+  return format_date(value) if isinstance(value, date) else value
+
+
+def date_to_ordinal(value) -> int:
+  if isinstance(value, int):
+    return value
+  return (value if isinstance(value, date) else cast_date(value)).toordinal()
 
 
 def date_is_in_range(start_date, end_date, target_date = None):
@@ -53,6 +73,7 @@ def remove_last_char(word: str):
   return word.rstrip(word[-1])
 
 
+@lru_cache(maxsize=DATE_CACHE_SIZE)
 def count_days_from_interval(start_date: str, end_date: str):
   return (cast_date(end_date) - cast_date(start_date)).days
 
@@ -60,4 +81,17 @@ def count_days_from_interval(start_date: str, end_date: str):
 def number_format(number: int|float) -> str:
   integer_part, decimal_part = f'{number:,.2f}'.split('.')
   integer_part = integer_part.replace(',', '.')
-  return f'{integer_part},{decimal_part}'
\ No newline at end of file
+  return f'{integer_part},{decimal_part}'
+
+
+def date_cache_info() -> dict:
+  return {
+    'cast_date': cast_date.cache_info()._asdict(),
+    'count_days_from_interval': count_days_from_interval.cache_info()._asdict(),
+  }
+
+
+def chunks(rows, size: int):
+  iterator = iter(rows)
+  while chunk := list(islice(iterator, size)):
+    yield chunk
@@ -1,39 +1,112 @@
 from abc import ABC, abstractmethod
-from re import match
-from pprint import pprint
-from datetime import datetime
+from re import compile
+from datetime import date
 
 from models import get_connection
 from utils import translate_column_name
 
 
+EMAIL_PATTERN = compile(r'^[\w\.-]+@[\w\.-]+\.[a-zA-Z]{2,}$')
+DATE_PATTERN = compile(r'(\d{2})/(\d{2})/(\d{4})')
+
+
 class Request(ABC):
-    def validate(self, data: dict, mode: str) -> list:
+    ERROR_MESSAGES: dict = {
+        'is_phone': 'O campo {field} não é um número de telefone válido',
+        'is_integer': 'O campo {field} não é um número inteiro',
+        'is_str': 'O campo {field} não é um texto',
+        'is_data': 'O campo {field} não é uma data válida',
+        'is_float': 'O campo {field} não é um número decimal',
+        'is_positive': 'O campo {field} não é um número positivo',
+        'is_required': 'O campo {field} é obrigatório',
+        'is_email': 'O campo {field} não é um e-mail válido',
+        'is_date': 'O campo {field} não é uma data válida',
+        'exists_in': 'O identificador para {field} não foi encontrado na base de dados',
+        'unique': 'O valor informado para {field} já está cadastrado',
+    }
+    _plans: dict = {}
+
+
+    def validate(self, data: dict, mode: str, model_id: int | None = None, snapshot: dict | None = None) -> list:
         """
         Valid a dict based in the validation rules of mode. Returns a list contains errors if validation failed.
         
         :param dict data:
         :param str mode:
+        :param int|None model_id: id of the record being updated, ignored by the unique rules
+        :param dict|None snapshot: live ids already fetched per table, used by the exists_in rules
         :return errors list:
         """
-        validation = self.create_validation() if mode == 'create' else self.update_validation()
         errors = []
-        for field, rules in validation.items():
-            for rule in rules:
-                if rule.startswith('exists_in:'):
-                    if (value := data.get(field)) and not self.exists_in(rule.split(':')[1], value):
-                        errors.append(self.get_errors_message(field)['exists_in'])
-                else:
-                    validated = getattr(self, rule)
-                    if mode == 'update':
-                        if (value := data.get(field)) and not validated(value):
-                            errors.append(self.get_errors_message(field)[rule])
-                    else:
-                        if not validated(data.get(field)):
-                            errors.append(self.get_errors_message(field)[rule])
+        for field, rule, passes in self.get_plan(mode):
+            if not passes(self, data.get(field), model_id, snapshot):
+                errors.append(self.get_error_message(rule, field))
         return errors
 
-    
+
+    def get_plan(self, mode: str) -> list:
+        """
+        Returns the rules of mode compiled into (field, rule, check) steps, built once per Request class
+        
+        :param str mode:
+        :return list:
+        """
+        key: tuple = (type(self), mode)
+        if (plan := Request._plans.get(key)) is None:
+            validation = self.create_validation() if mode == 'create' else self.update_validation()
+            plan = [(field, rule.partition(':')[0], self.compile_rule(field, rule, mode)) for field, rules in validation.items() for rule in rules]
+            Request._plans[key] = plan
+        return plan
+
+
+    def compile_rule(self, field: str, rule: str, mode: str):
+        """
+        Returns a check(request, value, model_id, snapshot) callable telling whether the value passes the rule
+        
+        :param str field:
+        :param str rule:
+        :param str mode:
+        """
+        name, _, argument = rule.partition(':')
+        match name:
+            case 'exists_in':
+                return lambda request, value, model_id, snapshot: value is None or value == '' or request.exists_in(argument, value, snapshot)
+            case 'unique':
+                return lambda request, value, model_id, snapshot: value is None or request.is_unique(argument, field, value, model_id)
+        check = getattr(type(self), name)
+        if mode == 'update':
+            return lambda request, value, model_id, snapshot: value is None or check(request, value)
+        return lambda request, value, model_id, snapshot: check(request, value)
+
+
+    def validate_many(self, rows: list, mode: str, model_ids: list | None = None) -> list:
+        """
+        Valid a batch of dicts, fetching the foreign keys of the whole batch at once. Returns the list of errors of each row.
+        
+        :param list rows:
+        :param str mode:
+        :param list|None model_ids: ids of the records being updated, in the order of rows
+        :return list:
+        """
+        snapshot: dict = self.fetch_snapshot(rows, mode)
+        return [self.validate(row, mode, model_id, snapshot) for row, model_id in zip(rows, model_ids or [None] * len(rows))]
+
+
+    def fetch_snapshot(self, rows: list, mode: str) -> dict:
+        """
+        Returns the live ids of every table referenced by the exists_in rules, limited to the values found in rows
+        
+        :param list rows:
+        :param str mode:
+        :return dict:
+        """
+        snapshot: dict = {}
+        for field, table in self.foreign_keys(mode).items():
+            ids: set = {value for row in rows if (value := row.get(field)) is not None}
+            snapshot[table] = snapshot.get(table, set()) | get_connection().existing_ids(table, ids)
+        return snapshot
+
+
     @abstractmethod
     def create_validation(self) -> dict:
         pass
@@ -70,20 +143,19 @@ class Request(ABC):
         :param str field:
         :return dict:
         """
-        pprint(field)
         field = translate_column_name(field)
-        return {
-            'is_phone': f'O campo {field} não é um número de telefone válido',
-            'is_integer': f'O campo {field} não é um número inteiro',
-            'is_str': f'O campo {field} não é um texto',
-            'is_data': f'O campo {field} não é uma data válida',
-            'is_float': f'O campo {field} não é um número decimal',
-            'is_positive': f'O campo {field} não é um número positivo',
-            'is_required': f'O campo {field} é obrigatório',
-            'is_email': f'O campo {field} não é um e-mail válido',
-            'is_date': f'O campo {field} não é uma data válida',
-            'exists_in': f'O identificador para {field} não foi encontrado na base de dados'
-        }
+        return {rule: message.format(field=field) for rule, message in self.ERROR_MESSAGES.items()}
+
+
+    def get_error_message(self, rule: str, field: str) -> str:
+        """
+        Returns the error message of a single rule
+        
+        :param str rule:
+        :param str field:
+        :return str:
+        """
+        return self.ERROR_MESSAGES[rule].format(field=translate_column_name(field))
 
 
     def is_phone(self, value) -> bool:
@@ -124,10 +196,10 @@ class Request(ABC):
         :param value:
         :return bool:
         """
-        if not isinstance(value, str) or len(value) != 10:
+        if not isinstance(value, str) or not (parts := DATE_PATTERN.fullmatch(value)):
             return False
         try:
-            datetime.strptime(value, '%d/%m/%Y')
+            date(int(parts[3]), int(parts[2]), int(parts[1]))
             return True
         except ValueError:
             return False
@@ -170,37 +242,61 @@ class Request(ABC):
         :author: ChatGPT
         :return bool:
         """
-        return match(r'^[\w\.-]+@[\w\.-]+\.[a-zA-Z]{2,}$', value)
+        return isinstance(value, str) and EMAIL_PATTERN.match(value) is not None
     
 
-    def exists_in(self, table: str, value: int) -> bool:
+    def exists_in(self, table: str, value: int, snapshot: dict | None = None) -> bool:
         """
         Verify if the value exists in the table like a foreign key
         
         :author: ChatGPT
         :param str table:
         :param int value:
+        :param dict|None snapshot:
         :return bool:
         """
-        tables = get_connection()
-        if table not in tables:
-            return False
-        table_data = tables[table]
-        return 0 <= value < len(table_data) and not table_data[value].get('deleted', False)
+        if snapshot is not None and table in snapshot:
+            return value in snapshot[table]
+        return get_connection().exists(table, value)
+
+
+    def foreign_keys(self, mode: str) -> dict:
+        """
+        Returns the table referenced by each field with an exists_in rule
+        
+        :param str mode:
+        :return dict:
+        """
+        validation = self.create_validation() if mode == 'create' else self.update_validation()
+        return {field: rule.split(':')[1] for field, rules in validation.items() for rule in rules if rule.startswith('exists_in:')}
+
+
+    def is_unique(self, table: str, column: str, value, model_id: int | None = None) -> bool:
+        """
+        Verify if no other record of the table holds the value in the column
+        
+        :param str table:
+        :param str column:
+        :param value:
+        :param int|None model_id:
+        :return bool:
+        """
+        owner: int | None = get_connection().find_unique(table, column, value)
+        return owner is None or owner == model_id
 
 
 class ClientRequest(Request):
     def create_validation(self) -> dict:
         return {
             'name': ['is_required', 'is_str'],
-            'email': ['is_required', 'is_email', 'is_str'],
+            'email': ['is_required', 'is_email', 'is_str', 'unique:clients'],
             'phone': ['is_required', 'is_phone'],
         }
     
     def update_validation(self) -> dict:
         return {
             'name': ['is_str'],
-            'email': ['is_email', 'is_str'],
+            'email': ['is_email', 'is_str', 'unique:clients'],
             'phone': ['is_phone']
         }
 
@@ -208,14 +304,14 @@ class ClientRequest(Request):
 class RoomRequest(Request):
     def create_validation(self) -> dict:
         return {
-            'number': ['is_required', 'is_integer', 'is_positive'],
+            'number': ['is_required', 'is_integer', 'is_positive', 'unique:rooms'],
             'maximum_capacity': ['is_required', 'is_integer', 'is_positive'],
             'diary_price': ['is_required', 'is_float', 'is_positive'],
         }
     
     def update_validation(self) -> dict:
         return {
-            'number': ['is_integer', 'is_positive'],
+            'number': ['is_integer', 'is_positive', 'unique:rooms'],
             'maximum_capacity': ['is_integer', 'is_positive'],
             'diary_price': ['is_float', 'is_positive'],
         }